@@ -26,7 +26,7 @@ def analyze_gameplay(request):
             'completed_games': 0,        # Completed games
             'wins': 0,                   # Number of wins
             'average_moves': 0,          # Average moves per win
-            'optimal_solutions': 0,      # Games won in 11 moves
+            'optimal_solutions': 0,      # Games won in the optimal number of moves
             'common_mistakes': defaultdict(int),
             'success_rate': 0,
             'average_time': 0,
@@ -48,7 +48,8 @@ def analyze_gameplay(request):
                     analytics['wins'] += 1
                     moves_count = game_data.get('moves_count', 0)
                     total_moves_in_wins += moves_count
-                    if moves_count == 11:
+                    # Sessions from before puzzle sizes were recorded are all 3/3/2
+                    if moves_count == game_data.get('optimal_moves', 11):
                         analytics['optimal_solutions'] += 1
                 
                 if game_data.get('game_duration'):
@@ -0,0 +1,154 @@
+"""Packed cache of the game's images, already scaled to their on-screen sizes.
+
+Decoding the PNGs and scaling them on every launch is most of the game's
+startup time. The build step (run this module) writes every image's final
+pixels to one file:
+
+    header      HEADER struct (magic, version, asset count)
+    entries     ENTRY struct per asset (source file, size, alpha, source stamp, offset)
+    pixels      RGBA (alpha) or RGB rows for each asset, in entry order
+
+load_images reads the file with one buffered read and wraps each asset
+with pygame.image.frombuffer. If the file is missing, was built for other
+sizes or any source PNG changed since (its CRC-32 differs), it falls back
+to decoding the PNGs. Checking a CRC reads the small PNG files but skips
+decoding and scaling them, and unlike mtimes it survives a fresh checkout.
+
+Example:
+    python lake_crossing_assets.py
+"""
+import os
+import struct
+import sys
+import zlib
+from collections import namedtuple
+
+import pygame
+
+import lake_crossing_files as files
+import lake_crossing_logging as logs
+
+log = logs.get_logger("render")
+
+MAGIC = b"LKAS"
+VERSION = 1
+# magic, version, asset count
+HEADER = struct.Struct("<4sHH")
+# source file name, width, height, has alpha, source CRC-32, source size, pixel offset
+ENTRY = struct.Struct("<64sHHBIQQ")
+
+CACHE_NAME = "assets.bin"
+
+Asset = namedtuple("Asset", ["file", "size", "alpha"])
+
+GAME_ASSETS = (
+    Asset("background.png", (800, 600), False),
+    Asset("priest.png", (50, 50), True),
+    Asset("carnivore.png", (50, 50), True),
+    Asset("boat.png", (100, 60), True),
+    Asset("button.png", (120, 50), True),
+)
+
+
+def _pixel_format(asset):
+    return "RGBA" if asset.alpha else "RGB"
+
+
+def _pixel_length(asset):
+    width, height = asset.size
+    return width * height * (4 if asset.alpha else 3)
+
+
+def _source_stamp(asset, base_dir):
+    with open(os.path.join(base_dir, asset.file), "rb") as f:
+        data = f.read()
+    return zlib.crc32(data), len(data)
+
+
+def load_png(asset, base_dir):
+    """Decode, convert and scale one asset from its PNG (needs a display mode set)"""
+    image = pygame.image.load(os.path.join(base_dir, asset.file))
+    image = image.convert_alpha() if asset.alpha else image.convert()
+    return pygame.transform.scale(image, asset.size)
+
+
+def build(assets=GAME_ASSETS, base_dir=".", path=None):
+    """Write the packed cache for assets atomically"""
+    path = path or os.path.join(base_dir, CACHE_NAME)
+    entries = []
+    pixels = []
+    offset = HEADER.size + ENTRY.size * len(assets)
+    for asset in assets:
+        crc, source_size = _source_stamp(asset, base_dir)
+        entries.append(ENTRY.pack(asset.file.encode("utf-8"), asset.size[0], asset.size[1], asset.alpha,
+                                  crc, source_size, offset))
+        pixels.append(pygame.image.tostring(load_png(asset, base_dir), _pixel_format(asset)))
+        offset += _pixel_length(asset)
+
+    def write(f):
+        f.write(HEADER.pack(MAGIC, VERSION, len(assets)))
+        f.writelines(entries)
+        f.writelines(pixels)
+
+    # Shipped next to the PNGs, so readable like them
+    files.atomic_write(path, write, permissions=0o644)
+
+
+def load_cached(assets=GAME_ASSETS, base_dir=".", path=None):
+    """{file: Surface} from the packed cache, or None if it is missing or stale"""
+    path = path or os.path.join(base_dir, CACHE_NAME)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or count != len(assets):
+        return None
+    if len(data) < HEADER.size + ENTRY.size * count:
+        return None
+
+    view = memoryview(data)
+    images = {}
+    for index, asset in enumerate(assets):
+        file_name, width, height, alpha, crc, source_size, offset = ENTRY.unpack_from(
+            data, HEADER.size + ENTRY.size * index)
+        if (file_name.rstrip(b"\0").decode("utf-8") != asset.file or (width, height) != tuple(asset.size) or
+                bool(alpha) != asset.alpha or offset + _pixel_length(asset) > len(data)):
+            return None
+        try:
+            if (crc, source_size) != _source_stamp(asset, base_dir):
+                return None
+        except OSError:
+            pass  # Shipped without its PNG; the cached pixels are all there is
+        image = pygame.image.frombuffer(view[offset:offset + _pixel_length(asset)], asset.size,
+                                        _pixel_format(asset))
+        # Converting to the display format copies the pixels, so the read buffer can go
+        images[asset.file] = image.convert_alpha() if asset.alpha else image.convert()
+    return images
+
+
+def load_images(assets=GAME_ASSETS, base_dir=".", path=None):
+    """{file: Surface} for every asset, from the packed cache when it is up to date"""
+    images = load_cached(assets, base_dir, path)
+    if images is None:
+        log.info("Asset cache missing or stale, loading PNGs (run %s to rebuild)", os.path.basename(__file__))
+        images = {asset.file: load_png(asset, base_dir) for asset in assets}
+    return images
+
+
+def main():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))  # Converting images needs a display format
+    base_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    build(GAME_ASSETS, base_dir)
+    print(f"Wrote {os.path.join(base_dir, CACHE_NAME)}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
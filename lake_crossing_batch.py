@@ -0,0 +1,81 @@
+"""Vectorized NumPy checks over many encoded game states at once.
+
+Codes come from lake_crossing_engine.StateCodec / StateTable. valid_mask
+and win_mask decode with shifts and masks, so they work for any puzzle
+size. replay needs a StateTable for its transition array.
+"""
+import numpy as np
+
+import lake_crossing_engine as engine
+
+
+def decode(codes, codec):
+    """(left priests, left carnivores, boat priests, boat carnivores, boat on right) arrays"""
+    codes = np.asarray(codes, dtype=np.int64)
+
+    def field(shift, next_shift):
+        return (codes >> shift) & ((1 << (next_shift - shift)) - 1)
+
+    return (field(0, codec.carnivores_shift),
+            field(codec.carnivores_shift, codec.boat_priests_shift),
+            field(codec.boat_priests_shift, codec.boat_carnivores_shift),
+            field(codec.boat_carnivores_shift, codec.side_shift),
+            (codes >> codec.side_shift) & 1)
+
+
+def valid_mask(codes, codec):
+    """True where carnivores do not outnumber priests on either shore"""
+    left_priests, left_carnivores, boat_priests, boat_carnivores, on_right = decode(codes, codec)
+    puzzle = codec.puzzle
+    right_priests = puzzle.priests - left_priests - boat_priests
+    right_carnivores = puzzle.carnivores - left_carnivores - boat_carnivores
+
+    # The boat's passengers count towards the shore it is docked at
+    docked_right = on_right.astype(bool)
+    left_priests = left_priests + np.where(docked_right, 0, boat_priests)
+    left_carnivores = left_carnivores + np.where(docked_right, 0, boat_carnivores)
+    right_priests = right_priests + np.where(docked_right, boat_priests, 0)
+    right_carnivores = right_carnivores + np.where(docked_right, boat_carnivores, 0)
+
+    left_eaten = (left_priests > 0) & (left_carnivores > left_priests)
+    right_eaten = (right_priests > 0) & (right_carnivores > right_priests)
+    return ~(left_eaten | right_eaten)
+
+
+def win_mask(codes, codec):
+    """True where everyone is on the right shore with an empty boat docked there"""
+    left_priests, left_carnivores, boat_priests, boat_carnivores, on_right = decode(codes, codec)
+    return ((left_priests == 0) & (left_carnivores == 0) &
+            (boat_priests == 0) & (boat_carnivores == 0) & (on_right == 1))
+
+
+def replay(move_indexes, state_table, start_codes=None):
+    """Play many move sequences at once.
+
+    move_indexes is a (games, steps) array of engine.MOVE_INDEX values.
+    Every game starts from start_codes (the initial state by default) and
+    stops at its first win or invalid state, as the game does. Returns
+    (final codes, won mask, lost mask, steps taken per game).
+    """
+    moves = np.asarray(move_indexes, dtype=np.int64)
+    games, steps = moves.shape
+    transitions = np.frombuffer(state_table.next, dtype=np.intc).astype(np.int64)
+    valid = np.frombuffer(state_table.valid, dtype=np.uint8).astype(bool)
+    win = np.frombuffer(state_table.win, dtype=np.uint8).astype(bool)
+
+    if start_codes is None:
+        codes = np.full(games, state_table.initial_code(), dtype=np.int64)
+    else:
+        codes = np.asarray(start_codes, dtype=np.int64).copy()
+    playing = valid[codes] & ~win[codes]
+    taken = np.zeros(games, dtype=np.int64)
+
+    for step in range(steps):
+        if not playing.any():
+            break
+        next_codes = transitions[codes * len(engine.MOVES) + moves[:, step]]
+        codes = np.where(playing, next_codes, codes)
+        taken += playing
+        playing &= valid[codes] & ~win[codes]
+
+    return codes, win[codes], ~valid[codes], taken
@@ -0,0 +1,144 @@
+"""Headless frame-time benchmark for the Lake Crossing Game.
+
+Runs LakeCrossingGame offline under SDL's dummy video driver, replays a
+scripted list of clicks and renders every frame off-screen. Game time
+advances by one fixed simulation step per frame, so a run takes the same
+frames on every machine and finishes as fast as the frames can be drawn.
+Reports average and p99 frame time split into update (clicks plus the
+simulation step) and draw.
+
+By default the script plays the first optimal solution of the puzzle,
+asking for a hint before every crossing. A JSON file with a list of [x, y]
+click positions can be given instead.
+
+Example:
+    python lake_crossing_benchmark.py --repeat 5 --dump-frames 0,60,240 --dump-dir frames
+"""
+import argparse
+import json
+import math
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import lake_crossing_engine as engine
+import lake_crossing_game_gemini7 as game_module
+import lake_crossing_logging as logs
+
+def character_at(game, character, place):
+    """Screen position that clicks a character sprite at place (LEFT, RIGHT or "boat")"""
+    for sprite in game.character_sprites[character]:
+        if sprite.place != place:
+            continue
+        # Big boards run off screen and overlap, so find a point where the click reaches this sprite
+        rect = sprite.rect
+        for x in range(rect.left + 1, rect.right, 3):
+            for y in range(rect.top + 2, rect.bottom, 8):
+                if game.renderer.sprite_at((x, y)) is sprite:
+                    return x, y
+    raise ValueError(f"No clickable {character} at {place}")
+
+
+def solution_clicks(game, hints=True):
+    """Clicks that play the puzzle's first optimal solution from the start.
+
+    Positions are read from the sprites as the game goes, so this has to
+    be consumed one click at a time with frames drawn in between.
+    """
+    loads = next(game.distance_oracle.optimal_solutions(), None)
+    if loads is None:
+        raise ValueError(f"{tuple(game.puzzle)} cannot be solved")
+    for priests, carnivores in loads:
+        if hints:
+            yield game.hint_button.center
+        for character, count in (("priests", priests), ("carnivores", carnivores)):
+            for _ in range(count):
+                yield character_at(game, character, game.boat_position)
+        yield game.move_boat_button.center
+        for character, count in (("priests", priests), ("carnivores", carnivores)):
+            for _ in range(count):
+                yield character_at(game, character, "boat")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_benchmark(game, script, repeat=1, frames_per_click=2, dump_frames=(), dump_dir="."):
+    """Replay script(game)'s clicks repeat times; (update, draw) seconds for every frame"""
+    update_times = []
+    draw_times = []
+    dump_frames = set(dump_frames)
+
+    def frame(click=None):
+        started = time.perf_counter()
+        if click is not None:
+            game.handle_click(click)
+        game.update(game_module.SIM_STEP)
+        updated = time.perf_counter()
+        game.draw()
+        update_times.append(updated - started)
+        draw_times.append(time.perf_counter() - updated)
+        number = len(draw_times) - 1
+        if number in dump_frames:
+            pygame.image.save(game.screen, os.path.join(dump_dir, f"frame_{number:05d}.png"))
+
+    for _ in range(repeat):
+        game.reset_game()
+        for click in script(game):
+            frame(click)
+            while game.moving_boat:
+                frame()
+            for _ in range(frames_per_click - 1):
+                frame()
+    return update_times, draw_times
+
+
+def report(update_times, draw_times):
+    total_times = [update + draw for update, draw in zip(update_times, draw_times)]
+    print(f"{len(total_times)} frames, {len(total_times) / sum(total_times):.0f} frames per second")
+    print(f"{'':8}{'avg ms':>10}{'p99 ms':>10}")
+    for name, times in (("update", update_times), ("draw", draw_times), ("frame", total_times)):
+        print(f"{name:8}{sum(times) / len(times) * 1000:>10.3f}{percentile(times, 0.99) * 1000:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Lake Crossing Game frame times without a display")
+    parser.add_argument("--puzzle", type=int, nargs=3, metavar=("PRIESTS", "CARNIVORES", "CAPACITY"),
+                        default=tuple(engine.CLASSIC))
+    parser.add_argument("--script", help="JSON list of [x, y] clicks (default: play an optimal solution)")
+    parser.add_argument("--no-hints", action="store_true", help="Leave hint clicks out of the default script")
+    parser.add_argument("--repeat", type=int, default=1, help="Play the script this many times")
+    parser.add_argument("--frames-per-click", type=int, default=2,
+                        help="Frames rendered after each click once the boat has docked")
+    parser.add_argument("--dump-frames", default="", help="Frame numbers to save as PNG, e.g. 0,60,240")
+    parser.add_argument("--dump-dir", default=".")
+    parser.add_argument("--log", help="Log levels for the game, as for LAKE_CROSSING_LOG (e.g. DEBUG)")
+    args = parser.parse_args()
+
+    dump_frames = [int(number) for number in args.dump_frames.split(",") if number.strip()]
+    if dump_frames:
+        os.makedirs(args.dump_dir, exist_ok=True)
+
+    logs.configure(args.log)
+    game = game_module.LakeCrossingGame(engine.Puzzle(*args.puzzle), offline=True)
+    if args.script:
+        with open(args.script) as f:
+            clicks = [tuple(click) for click in json.load(f)]
+        script = lambda game: clicks
+    else:
+        script = lambda game: solution_clicks(game, hints=not args.no_hints)
+    update_times, draw_times = run_benchmark(game, script, args.repeat, args.frames_per_click,
+                                             dump_frames, args.dump_dir)
+    game.events.drain()
+    report(update_times, draw_times)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
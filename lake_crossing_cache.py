@@ -0,0 +1,135 @@
+"""Persistent on-disk cache of solved puzzles.
+
+Each (priests, carnivores, capacity) puzzle is solved once and its
+DistanceOracle arrays are written to one file with a fixed binary layout:
+
+    header      HEADER struct (magic, version, byte order, puzzle, size)
+    distances   int32 x size   crossings left to win, -1 if it cannot win
+    next_moves  int16 x size   solver.boat_loads() index, -1 if no move wins
+
+Loading maps the file read-only with mmap, so startup costs almost nothing
+and every process shares the same pages. Files are written to a temporary
+name and renamed into place, so readers never see a partial file. The
+directory is capped in size and the least recently used files are evicted
+first.
+"""
+import mmap
+import os
+import struct
+import sys
+
+import lake_crossing_engine as engine
+import lake_crossing_files as files
+import lake_crossing_solver as solver
+
+MAGIC = b"LKCS"
+VERSION = 1
+# magic, version, byte order (0 little / 1 big), priests, carnivores, capacity, size
+HEADER = struct.Struct("<4sHHIIII")
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def cache_path(puzzle, cache_dir=None):
+    return os.path.join(cache_dir or files.default_cache_dir(),
+                        f"solution_{puzzle.priests}_{puzzle.carnivores}_{puzzle.capacity}.bin")
+
+
+class CachedSolution:
+    """Read-only, memory-mapped distance and next-move arrays for one puzzle"""
+
+    def __init__(self, puzzle, path):
+        self.puzzle = puzzle
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError(f"Truncated solution cache: {path}")
+            magic, version, byte_order, priests, carnivores, capacity, size = HEADER.unpack_from(self._map)
+            expected_size = (puzzle.priests + 1) * (puzzle.carnivores + 1) * 2
+            if (magic != MAGIC or version != VERSION or byte_order != _byte_order() or
+                    (priests, carnivores, capacity) != tuple(puzzle) or size != expected_size or
+                    len(self._map) != HEADER.size + size * 6):
+                raise ValueError(f"Stale or corrupt solution cache: {path}")
+            view = memoryview(self._map)
+            self.distances = view[HEADER.size:HEADER.size + size * 4].cast("i")
+            self.next_moves = view[HEADER.size + size * 4:].cast("h")
+        except Exception:
+            self._map.close()
+            raise
+
+    def oracle(self):
+        return solver.DistanceOracle(self.puzzle, distances=self.distances, next_moves=self.next_moves)
+
+    def close(self):
+        self.distances.release()
+        self.next_moves.release()
+        self._map.close()
+
+
+def _byte_order():
+    return 0 if sys.byteorder == "little" else 1
+
+
+def write_solution(puzzle, oracle, path):
+    """Write oracle's arrays to path atomically"""
+    def write(f):
+        f.write(HEADER.pack(MAGIC, VERSION, _byte_order(),
+                            puzzle.priests, puzzle.carnivores, puzzle.capacity, oracle.size))
+        f.write(memoryview(oracle.distances).cast("B"))
+        f.write(memoryview(oracle.next_moves).cast("B"))
+
+    files.atomic_write(path, write)
+
+
+def evict(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, keep=None):
+    """Delete least recently used cache files until the directory fits in max_bytes"""
+    cache_dir = cache_dir or files.default_cache_dir()
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return
+    entries = []
+    for name in names:
+        if not (name.startswith("solution_") and name.endswith(".bin")):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # Removed by another process
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            # Processes that already mapped the file keep their pages
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def load_or_solve(puzzle=engine.CLASSIC, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """CachedSolution for puzzle, solving and writing it first if needed"""
+    path = cache_path(puzzle, cache_dir)
+    try:
+        solution = CachedSolution(puzzle, path)
+    except (OSError, ValueError):
+        solution = None
+
+    if solution is None:
+        write_solution(puzzle, solver.DistanceOracle(puzzle), path)
+        solution = CachedSolution(puzzle, path)
+        evict(cache_dir, max_bytes, keep=path)
+    else:
+        try:
+            os.utime(path)  # Mark as recently used for eviction
+        except OSError:
+            pass
+    return solution
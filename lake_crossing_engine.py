@@ -0,0 +1,203 @@
+"""Rules engine for the Lake Crossing Game.
+
+Has no pygame, Firebase or Gemini dependencies so the rules can be checked
+headless by tests, bots and servers. A game position is an immutable State
+value and every rule is a pure function of it.
+"""
+from array import array
+from collections import namedtuple
+
+Puzzle = namedtuple("Puzzle", ["priests", "carnivores", "capacity"])
+
+CLASSIC = Puzzle(priests=3, carnivores=3, capacity=2)
+
+LEFT = "left"
+RIGHT = "right"
+
+# Characters still on the boat count towards the shore it is docked at
+State = namedtuple("State", [
+    "left_priests",
+    "left_carnivores",
+    "boat_priests",
+    "boat_carnivores",
+    "boat_position",
+])
+
+BOARD = "board"  # Shore -> boat
+LAND = "land"    # Boat -> shore
+CROSS = "cross"  # Boat -> other shore
+
+Move = namedtuple("Move", ["action", "character"])
+
+BOARD_PRIEST = Move(BOARD, "priests")
+BOARD_CARNIVORE = Move(BOARD, "carnivores")
+LAND_PRIEST = Move(LAND, "priests")
+LAND_CARNIVORE = Move(LAND, "carnivores")
+CROSS_BOAT = Move(CROSS, None)
+
+MOVES = (BOARD_PRIEST, BOARD_CARNIVORE, LAND_PRIEST, LAND_CARNIVORE, CROSS_BOAT)
+MOVE_INDEX = {move: index for index, move in enumerate(MOVES)}
+
+
+def initial_state(puzzle=CLASSIC):
+    """Everyone on the left shore with an empty boat"""
+    return State(puzzle.priests, puzzle.carnivores, 0, 0, LEFT)
+
+
+def right_shore(state, puzzle=CLASSIC):
+    """(priests, carnivores) standing on the right shore"""
+    return (puzzle.priests - state.left_priests - state.boat_priests,
+            puzzle.carnivores - state.left_carnivores - state.boat_carnivores)
+
+
+def boat_load(state):
+    return state.boat_priests + state.boat_carnivores
+
+
+def is_legal(state, move, puzzle=CLASSIC):
+    """Whether move can be made from state"""
+    action, character = move
+    if action == CROSS:
+        return boat_load(state) > 0
+    on_boat = state.boat_priests if character == "priests" else state.boat_carnivores
+    if action == LAND:
+        return on_boat > 0
+    # BOARD
+    if boat_load(state) >= puzzle.capacity:
+        return False
+    if state.boat_position == LEFT:
+        on_left = state.left_priests if character == "priests" else state.left_carnivores
+        return on_left > 0
+    right_priests, right_carnivores = right_shore(state, puzzle)
+    return (right_priests if character == "priests" else right_carnivores) > 0
+
+
+def apply_move(state, move, puzzle=CLASSIC):
+    """Return the state after move, or state itself if the move is not legal"""
+    if not is_legal(state, move, puzzle):
+        return state
+    action, character = move
+    if action == CROSS:
+        return state._replace(boat_position=RIGHT if state.boat_position == LEFT else LEFT)
+
+    step = 1 if action == BOARD else -1
+    boat_priests, boat_carnivores = state.boat_priests, state.boat_carnivores
+    if character == "priests":
+        boat_priests += step
+    else:
+        boat_carnivores += step
+
+    left_priests, left_carnivores = state.left_priests, state.left_carnivores
+    if state.boat_position == LEFT:
+        # Only the left shore is stored; the right shore is derived from the totals
+        if character == "priests":
+            left_priests -= step
+        else:
+            left_carnivores -= step
+    return State(left_priests, left_carnivores, boat_priests, boat_carnivores, state.boat_position)
+
+
+def is_valid(state, puzzle=CLASSIC):
+    """Carnivores must not outnumber priests on either shore"""
+    left_priests, left_carnivores = state.left_priests, state.left_carnivores
+    right_priests, right_carnivores = right_shore(state, puzzle)
+    if state.boat_position == LEFT:
+        left_priests += state.boat_priests
+        left_carnivores += state.boat_carnivores
+    else:
+        right_priests += state.boat_priests
+        right_carnivores += state.boat_carnivores
+    if left_priests > 0 and left_carnivores > left_priests:
+        return False
+    if right_priests > 0 and right_carnivores > right_priests:
+        return False
+    return True
+
+
+def is_win(state):
+    """Everyone on the right shore with an empty boat docked there"""
+    return (state.left_priests == 0 and
+            state.left_carnivores == 0 and
+            state.boat_priests == 0 and
+            state.boat_carnivores == 0 and
+            state.boat_position == RIGHT)
+
+
+class StateCodec:
+    """Bit-packed integer codes for the States of a puzzle.
+
+    A code packs, from the low bits up, left priests, left carnivores, boat
+    priests, boat carnivores and the boat side (1 for right) into one int.
+    The field widths only depend on the puzzle, so encoding is cheap even
+    for puzzles too large for a StateTable.
+    """
+
+    def __init__(self, puzzle=CLASSIC):
+        self.puzzle = puzzle
+        self.carnivores_shift = puzzle.priests.bit_length()
+        self.boat_priests_shift = self.carnivores_shift + puzzle.carnivores.bit_length()
+        self.boat_carnivores_shift = self.boat_priests_shift + min(puzzle.capacity, puzzle.priests).bit_length()
+        self.side_shift = self.boat_carnivores_shift + min(puzzle.capacity, puzzle.carnivores).bit_length()
+        self.size = 1 << (self.side_shift + 1)
+
+    def encode(self, state):
+        return (state.left_priests |
+                state.left_carnivores << self.carnivores_shift |
+                state.boat_priests << self.boat_priests_shift |
+                state.boat_carnivores << self.boat_carnivores_shift |
+                (state.boat_position == RIGHT) << self.side_shift)
+
+    def decode(self, code):
+        return State(code & ((1 << self.carnivores_shift) - 1),
+                     (code >> self.carnivores_shift) & ((1 << (self.boat_priests_shift - self.carnivores_shift)) - 1),
+                     (code >> self.boat_priests_shift) & ((1 << (self.boat_carnivores_shift - self.boat_priests_shift)) - 1),
+                     (code >> self.boat_carnivores_shift) & ((1 << (self.side_shift - self.boat_carnivores_shift)) - 1),
+                     RIGHT if code >> self.side_shift & 1 else LEFT)
+
+    def initial_code(self):
+        return self.encode(initial_state(self.puzzle))
+
+
+class StateTable(StateCodec):
+    """StateCodec with the rules precomputed for every code.
+
+    next[code * len(MOVES) + move_index] is the code after that move (the
+    same code when the move is not legal), and valid[code] / win[code] are
+    0 or 1. Codes that no State maps to are left at -1 / 0. The tables grow
+    with the packed code space, so they are meant for game-sized puzzles;
+    use the solver for very large ones.
+    """
+
+    def __init__(self, puzzle=CLASSIC):
+        super().__init__(puzzle)
+        self.states = [None] * self.size
+        self.valid = bytearray(self.size)
+        self.win = bytearray(self.size)
+        self.next = array("i", [-1]) * (self.size * len(MOVES))
+
+        for state in self._all_states():
+            code = self.encode(state)
+            self.states[code] = state
+            self.valid[code] = is_valid(state, puzzle)
+            self.win[code] = is_win(state)
+        for code, state in enumerate(self.states):
+            if state is None:
+                continue
+            base = code * len(MOVES)
+            for index, move in enumerate(MOVES):
+                self.next[base + index] = self.encode(apply_move(state, move, puzzle))
+
+    def _all_states(self):
+        puzzle = self.puzzle
+        for boat_priests in range(min(puzzle.capacity, puzzle.priests) + 1):
+            for boat_carnivores in range(min(puzzle.capacity - boat_priests, puzzle.carnivores) + 1):
+                for left_priests in range(puzzle.priests - boat_priests + 1):
+                    for left_carnivores in range(puzzle.carnivores - boat_carnivores + 1):
+                        for side in (LEFT, RIGHT):
+                            yield State(left_priests, left_carnivores, boat_priests, boat_carnivores, side)
+
+    def decode(self, code):
+        return self.states[code]
+
+    def step(self, code, move_index):
+        return self.next[code * len(MOVES) + move_index]
@@ -0,0 +1,87 @@
+"""Typed game events and a small publish/subscribe bus.
+
+The game publishes one small event per change instead of having every
+consumer re-read the full state after each click. Subscribers register per
+event type. Handlers that do slow work (network, disk) can subscribe with
+background=True and run in order on a worker thread, off the frame loop.
+"""
+import queue
+import threading
+from collections import namedtuple
+
+import lake_crossing_engine as engine
+import lake_crossing_logging as logs
+
+log = logs.get_logger("engine")
+
+CharacterBoarded = namedtuple("CharacterBoarded", ["character", "shore", "state_code"])
+CharacterLanded = namedtuple("CharacterLanded", ["character", "shore", "state_code"])
+BoatCrossed = namedtuple("BoatCrossed", ["shore", "moves", "wasted", "state_code"])
+GameWon = namedtuple("GameWon", ["moves", "state_code", "duration"])  # duration: seconds since the game started
+GameLost = namedtuple("GameLost", ["moves", "state_code", "duration"])
+GameReset = namedtuple("GameReset", ["state_code"])
+
+MOVE_EVENTS = (CharacterBoarded, CharacterLanded, BoatCrossed)
+GAME_OVER_EVENTS = (GameWon, GameLost)
+
+
+def events_for_move(codec, before, move, after, moves, wasted=False, duration=None):
+    """Events describing the change from code before to code after (codes from a StateCodec or StateTable)"""
+    if before == after:
+        return []
+    state = codec.decode(after)
+    if move.action == engine.BOARD:
+        events = [CharacterBoarded(move.character, state.boat_position, after)]
+    elif move.action == engine.LAND:
+        events = [CharacterLanded(move.character, state.boat_position, after)]
+    else:
+        events = [BoatCrossed(state.boat_position, moves, wasted, after)]
+
+    if engine.is_win(state):
+        events.append(GameWon(moves, after, duration))
+    elif not engine.is_valid(state, codec.puzzle):
+        events.append(GameLost(moves, after, duration))
+    return events
+
+
+class EventBus:
+    def __init__(self):
+        self._handlers = {}
+        self._queue = None
+
+    def subscribe(self, event_types, handler, background=False):
+        """Call handler(event) for every published event of the given type(s)"""
+        if not isinstance(event_types, tuple):
+            event_types = (event_types,)
+        if background:
+            handler = self._in_background(handler)
+        for event_type in event_types:
+            self._handlers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event):
+        for handler in self._handlers.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception:
+                log.exception("Error in %s handler", type(event).__name__)
+
+    def _in_background(self, handler):
+        if self._queue is None:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run_background, daemon=True).start()
+        return lambda event: self._queue.put((handler, event))
+
+    def _run_background(self):
+        while True:
+            handler, event = self._queue.get()
+            try:
+                handler(event)
+            except Exception:
+                log.exception("Error in background %s handler", type(event).__name__)
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        """Block until every queued background handler has run"""
+        if self._queue is not None:
+            self._queue.join()
@@ -0,0 +1,35 @@
+"""File helpers shared by the caches, the asset pack and the log file.
+
+Kept free of game imports, so logging and asset loading don't pull in the
+solver just to find the cache directory or replace a file safely.
+"""
+import os
+import tempfile
+
+
+def default_cache_dir():
+    return os.environ.get("LAKE_CROSSING_CACHE_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache", "lake_crossing"))
+
+
+def atomic_write(path, write, permissions=None):
+    """Call write(f) on a binary temporary file next to path, then rename it into place.
+
+    Readers see the old file or the whole new one, never part of it. The
+    temporary file is private (0600) unless permissions says otherwise.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        if permissions is not None:
+            os.chmod(temp_path, permissions)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -1,5 +1,6 @@
 import pygame
 import sys
+import concurrent.futures
 import os
 import google.generativeai as genai
 import textwrap
@@ -16,7 +17,17 @@ import os
 from google.oauth2 import service_account
 import requests
 import json
+import logging
 import time
+import lake_crossing_assets as assets
+import lake_crossing_cache as solution_cache
+import lake_crossing_engine as engine
+import lake_crossing_events as events
+import lake_crossing_logging as logs
+import lake_crossing_profiler as profiling
+import lake_crossing_render as render
+import lake_crossing_responses as response_cache
+import lake_crossing_solver as solver
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -28,12 +39,61 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+engine_log = logs.get_logger("engine")
+render_log = logs.get_logger("render")
+firebase_log = logs.get_logger("firebase")
+gemini_log = logs.get_logger("gemini")
+tts_log = logs.get_logger("tts")
+
+FPS = 60
+IDLE_WAIT_MS = 1000  # Upper bound on how long an idle loop sleeps before checking again
+WAKE_EVENT = pygame.USEREVENT + 1
+SIM_STEP = 1 / 60  # Seconds of game time advanced by one simulation step
+MAX_FRAME_TIME = 0.25  # Longer hitches are dropped instead of replayed as a burst of steps
+BOAT_SPEED = 300  # Pixels per second
+OVERLAY_SECONDS = 5  # How long hints and narration stay on screen
+LIVE_TIMEOUT = 8  # Seconds Gemini gets to word a hint or narrate a move before the fallback is used
+ANALYTICS_TIMEOUT = 2 * LIVE_TIMEOUT  # The analytics fetch and Gemini's analysis of it each get LIVE_TIMEOUT
+THINKING_TEXT = "Thinking..."
+NARRATION_FALLBACK = "The tension rises as the journey continues..."
+LOADING_ANALYSIS = "Loading analysis..."
+ANALYSIS_FALLBACK = "Focus on maintaining balance between shores and following boat capacity rules."
+NO_ANALYTICS = {'success_rate': 0, 'average_moves': 0, 'optimal_solutions': 0, 'total_games': 0}
+
+# Scene layers, bottom to top
+BOARD_LAYER = 0  # Boat, labels and buttons
+CHARACTER_LAYER = 1
+GAME_OVER_LAYER = 2  # Dims the board
+GAME_OVER_BUTTON_LAYER = 3  # Restart buttons, and the side buttons once the game is over
+OVERLAY_LAYER = 4  # Hint, narration and stats panels
+PROFILER_LAYER = 5
+PROFILER_REFRESH = 0.25  # Seconds between redraws of the profiler overlay
+
+# Character layout: each shore is SHORE_WIDTH px wide, and the boat fits BOAT_SPAN px of passengers
+CHARACTER_SIZE = 50
+SHORE_WIDTH = 170
+BOAT_SPAN = 105
+
+class CharacterSprite(render.SceneSprite):
+    """A priest or carnivore; place is where it is now (LEFT, RIGHT or 'boat')"""
+
+    def __init__(self, image, character):
+        render.SceneSprite.__init__(self, image, layer=CHARACTER_LAYER, clickable=True)
+        self.character = character
+        self.place = None
+
 class LakeCrossingGame:
-    def __init__(self):
+    def __init__(self, puzzle=engine.CLASSIC, offline=False):
+        self.puzzle = puzzle
+        self.offline = offline  # No Firebase, Gemini or speech; moves are allowed without a database
+        # Integer codes for game states; the rules are applied per move, so startup doesn't grow with the puzzle
+        self.codec = engine.StateCodec(puzzle)
+        self.events = events.EventBus()
+        self.profiler = profiling.FrameProfiler()  # Toggled with F3
         pygame.init()
         pygame.mixer.init()
         pygame.mixer.music.set_volume(1.0)  # Set volume to maximum
-        print(f"Pygame mixer initialized. Volume: {pygame.mixer.music.get_volume()}")  # Debug print
+        tts_log.debug("Pygame mixer initialized. Volume: %s", pygame.mixer.music.get_volume())
         self.width, self.height = 800, 600
         self.screen = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption("Lake Crossing Game")
@@ -42,55 +102,93 @@ class LakeCrossingGame:
         self.db = None
         self.game_session_id = None  # Add this to track current session
         self.start_time = time.time()
+        self.narration_version = 0  # Bumped on every move and reset; narration for older versions is dropped
         
         self.reset_game()
         
         self.font = pygame.font.Font(None, 36)
         self.button_font = pygame.font.Font(None, 24)  # Smaller font for buttons
         self.hint_font = pygame.font.Font(None, 24)  # Smaller font for hints and narration
+        self.stats_font = pygame.font.Font(None, 22)
+        self.text_cache = render.TextCache()  # Rendered labels, reused across frames
+        # Overlays are rebuilt only when their content changes
+        self.hint_panel = render.CachedSurface(lambda text: self.build_text_panel(text, (600, 100), 70))
+        self.narration_panel = render.CachedSurface(lambda text: self.build_text_panel(text, (700, 100), 80))
+        self.game_over_panel = render.CachedSurface(self.build_game_over_panel)
         self.load_images()
         self.create_buttons()
-        self.setup_gemini()
+        if not offline:
+            self.setup_gemini()
+        self.hint_loads = solver.boat_loads(self.puzzle)
+        self.distance_oracle = self.load_distance_oracle()  # Crossings left to win from any position
+        self.optimal_moves = self.distance_oracle.distance(solver.start_position(self.puzzle))
+        self.optimal_solution_count = self.distance_oracle.count_optimal_solutions()
         self.narration = ""
         self.hint = ""
         self.hint_timer = 0
         self.narration_timer = 0
-        self.narration_enabled = True
-        self.last_move_state = self.get_game_state_string()
+        self.narration_enabled = not offline
+        self.renderer = render.SceneRenderer(self.screen, self.background, self.profiler)
+        self.build_scene()
         
         # Initialize Firebase after everything else
-        self.setup_firebase()
-        if self.db:
-            self.create_game_session()
-        
-        self.setup_text_to_speech()
+        if offline:
+            self.tts_client = None
+        else:
+            self.setup_firebase()
+            if self.db:
+                self.create_game_session()
+            
+            self.setup_text_to_speech()
         self.audio_playing = False
+        self.speech_request = None  # Future for hint speech being synthesized
+        self.analytics_request = None  # (future, deadline) while the stats panel's data is fetched
         
         self.first_move = None
         self.game_over_screen_drawn = False  # Add this new flag
         
+        self.subscribe_to_events()
+        
+    def subscribe_to_events(self):
+        """Wire up the consumers of game events"""
+        self.events.subscribe(events.GAME_OVER_EVENTS, self.on_game_over)
+        self.events.subscribe(events.MOVE_EVENTS, self.on_move_narration)
+        self.events.subscribe(events.BoatCrossed, self.on_boat_crossed)
+        # Firestore writes are network round trips, so keep them off the frame loop
+        self.events.subscribe(events.BoatCrossed, self.save_move_to_firebase, background=True)
+        self.events.subscribe(events.GAME_OVER_EVENTS, self.finalize_session_in_firebase, background=True)
+        self.events.subscribe(events.GameReset, self.on_game_reset, background=True)
+        
+    def load_distance_oracle(self):
+        """Solved tables for this puzzle, from the on-disk cache when possible"""
+        try:
+            return solution_cache.load_or_solve(self.puzzle).oracle()
+        except OSError as e:
+            engine_log.warning("Solution cache unavailable, solving in memory: %s", e)
+            return solver.DistanceOracle(self.puzzle)
+
     def setup_firebase(self):
         try:
-            print("Starting Firebase setup...")  # Debug print
+            firebase_log.debug("Starting Firebase setup")
             # Initialize Firebase with your credentials
             cred = credentials.Certificate('YOUR_FIREBASE_CREDENTIALS_JSON')
-            print("Credentials loaded")  # Debug print
+            firebase_log.debug("Credentials loaded")
             
             firebase_admin.initialize_app(cred)
-            print("Firebase app initialized")  # Debug print
+            firebase_log.debug("Firebase app initialized")
             
             # Initialize Firestore
             self.db = firestore.client()
-            print("Firestore client created")  # Debug print
+            firebase_log.debug("Firestore client created")
             
             # Test the connection
             test_ref = self.db.collection('test').document()
             test_ref.set({'test': 'connection'})
-            print("Test document created successfully")  # Debug print
+            firebase_log.debug("Test document created")
             
-            print("Firebase setup completed successfully")
+            firebase_log.info("Firebase setup completed")
         except Exception as e:
-            print(f"Detailed error in Firebase setup: {str(e)}")  # More detailed error
+            firebase_log.error("Firebase setup failed: %s", e)
             self.db = None
 
     def create_game_session(self):
@@ -105,72 +203,123 @@ class LakeCrossingGame:
                 'moves_count': 0,
                 'status': 'in_progress',
                 'win': False,
-                'game_state': self.get_game_state_string()
+                'puzzle': list(self.puzzle),
+                'optimal_moves': self.optimal_moves,
+                'game_state': self.get_game_state_string(),
+                'state_code': self.state_code
             }
             
             session_ref.set(session_data)
-            print(f"Created new game session: {self.game_session_id}")
+            firebase_log.info("Created new game session: %s", self.game_session_id)
         except Exception as e:
-            print(f"Error creating game session: {e}")
+            firebase_log.error("Error creating game session: %s", e)
 
-    def save_moves_to_firebase(self):
-        """Update the current game session with move data"""
+    def save_move_to_firebase(self, event):
+        """Append a finished crossing to the current game session"""
         if self.db is None or self.game_session_id is None:
             return
         
         try:
             session_ref = self.db.collection('game_sessions').document(self.game_session_id)
+            game_state = self.get_game_state_string(event.state_code, event.moves)
+            move_data = {
+                'timestamp': datetime.datetime.now(),
+                'game_state': game_state,
+                'state_code': event.state_code,
+                'moves_wasted': self.moves_wasted(event.state_code, event.moves),
+                'mistakes': self.track_mistakes(event.state_code, event.wasted)
+            }
             
-            # If game is over, finalize the session
-            if self.game_over:
-                session_ref.update({
-                    'end_time': datetime.datetime.now(),
-                    'game_duration': time.time() - self.start_time,
-                    'moves_count': self.moves,
-                    'win': self.win,
-                    'status': 'completed',
-                    'final_state': self.get_game_state_string()
-                })
-            else:
-                # Add move to existing session
-                move_data = {
-                    'timestamp': datetime.datetime.now(),
-                    'game_state': self.get_game_state_string(),
-                    'mistakes': self.track_mistakes()
-                }
-                
-                session_ref.update({
-                    'moves': firestore.ArrayUnion([move_data]),
-                    'moves_count': self.moves,
-                    'current_state': self.get_game_state_string()
-                })
-            
+            session_ref.update({
+                'moves': firestore.ArrayUnion([move_data]),
+                'moves_count': event.moves,
+                'current_state': game_state,
+                'current_state_code': event.state_code
+            })
+        except Exception as e:
+            firebase_log.error("Error saving to Firebase: %s", e)
+
+    def finalize_session_in_firebase(self, event):
+        """Mark the current game session as completed"""
+        if self.db is None or self.game_session_id is None:
+            return
+        
+        try:
+            session_ref = self.db.collection('game_sessions').document(self.game_session_id)
+            session_ref.update({
+                'end_time': datetime.datetime.now(),
+                'game_duration': event.duration,  # self.start_time may already belong to the next game
+                'moves_count': event.moves,
+                'win': isinstance(event, events.GameWon),
+                'status': 'completed',
+                'final_state': self.get_game_state_string(event.state_code, event.moves),
+                'final_state_code': event.state_code
+            })
         except Exception as e:
-            print(f"Error saving to Firebase: {e}")
+            firebase_log.error("Error saving to Firebase: %s", e)
 
-    def track_mistakes(self):
+    def track_mistakes(self, state_code=None, wasted=None):
         """Track common mistakes during gameplay"""
+        state = self.codec.decode(self.state_code if state_code is None else state_code)
+        if wasted is None:
+            wasted = self.last_crossing_wasted
         mistakes = []
         
         # Check for carnivores outnumbering priests
-        for shore in [self.left_shore, self.right_shore]:
-            if shore['priests'] > 0 and shore['carnivores'] > shore['priests']:
+        right_priests, right_carnivores = engine.right_shore(state, self.puzzle)
+        for priests, carnivores in [(state.left_priests, state.left_carnivores), (right_priests, right_carnivores)]:
+            if priests > 0 and carnivores > priests:
                 mistakes.append('carnivores_outnumber_priests')
         
         # Check for invalid boat loads
-        if sum(self.boat.values()) > 2:
+        if engine.boat_load(state) > self.puzzle.capacity:
             mistakes.append('invalid_boat_load')
         
+        # Check for a crossing that moved away from the goal
+        if wasted:
+            mistakes.append('wasted_move')
+        
         return mistakes
 
+    def moves_wasted(self, state_code=None, moves=None):
+        """Crossings made beyond the optimal line, or None once the game can no longer be won"""
+        state = self.codec.decode(self.state_code if state_code is None else state_code)
+        distance = self.distance_oracle.distance_to_goal(state)
+        if distance is None or self.optimal_moves is None:
+            return None
+        return (self.moves if moves is None else moves) + distance - self.optimal_moves
+
+    @property
+    def state(self):
+        return self.codec.decode(self.state_code)
+
+    @property
+    def left_shore(self):
+        return {"priests": self.state.left_priests, "carnivores": self.state.left_carnivores}
+
+    @property
+    def right_shore(self):
+        priests, carnivores = engine.right_shore(self.state, self.puzzle)
+        return {"priests": priests, "carnivores": carnivores}
+
+    @property
+    def boat(self):
+        return {"priests": self.state.boat_priests, "carnivores": self.state.boat_carnivores}
+
+    @property
+    def boat_position(self):
+        return self.state.boat_position
+
     def reset_game(self):
-        self.left_shore = {"priests": 3, "carnivores": 3}
-        self.right_shore = {"priests": 0, "carnivores": 0}
-        self.boat_position = "left"
-        self.boat = {"priests": 0, "carnivores": 0}
+        self.state_code = self.codec.initial_code()
         self.moves = 0
+        self.start_time = time.time()
+        self.last_crossing_wasted = False
         self.boat_x = 200
-        self.boat_speed = 5
+        self.previous_boat_x = self.boat_x  # Boat position one simulation step ago
+        self.drawn_boat_x = self.boat_x  # Where the last frame put the boat
+        self.boat_speed = BOAT_SPEED
+        self.sim_accumulator = 0.0
         self.moving_boat = False
         self.game_over = False
         self.win = False
@@ -178,388 +327,499 @@ class LakeCrossingGame:
         # Fetch best score when starting new game
         self._best_score = self.fetch_best_score_from_firebase()
         
-        # Create new session if resetting after completion
-        if hasattr(self, 'game_over') and self.game_over and self.db:
-            self.create_game_session()
-        
         self.game_over_screen_drawn = False  # Reset the flag when game restarts
+        self.hint_request = None  # (future, state code, solver wording, deadline) while Gemini words a hint
+        self.narration_version += 1
+        self.narration_request = None  # (future, version) for the narration being written
+        self.events.publish(events.GameReset(self.state_code))
 
     def load_images(self):
-        self.background = pygame.transform.scale(pygame.image.load(resource_path("background.png")).convert(), (self.width, self.height))
-        self.priest_img = self.load_and_scale("priest.png", (50, 50))
-        self.carnivore_img = self.load_and_scale("carnivore.png", (50, 50))
-        self.boat_img = self.load_and_scale("boat.png", (100, 60))
-        self.button_img = self.load_and_scale("button.png", (120, 50))
-
-    def load_and_scale(self, image_name, size):
-        return pygame.transform.scale(pygame.image.load(resource_path(image_name)).convert_alpha(), size)
+        # Pre-scaled pixels from assets.bin when it is current, otherwise the PNGs
+        images = assets.load_images(assets.GAME_ASSETS, resource_path("."))
+        self.background = images["background.png"]
+        self.priest_img = images["priest.png"]
+        self.carnivore_img = images["carnivore.png"]
+        self.boat_img = images["boat.png"]
+        self.button_img = images["button.png"]
 
     def create_buttons(self):
         self.move_boat_button = pygame.Rect(340, 20, 120, 50)
         self.try_again_button = pygame.Rect(250, 300, 120, 50)
         self.end_game_button = pygame.Rect(430, 300, 120, 50)
+        self.play_again_button = pygame.Rect(0, 0, 120, 50)
+        self.play_again_button.center = (self.width // 2, 300)  # Centered and moved down by 150 pixels
         self.hint_button = pygame.Rect(580, 20, 120, 50)
         self.narrate_button = pygame.Rect(580, 80, 120, 50)
         self.stats_button = pygame.Rect(580, 140, 120, 50)
+        
+        # Overlay panels
+        self.hint_rect = pygame.Rect(100, 450, 600, 100)
+        self.narration_rect = pygame.Rect(50, 50, 700, 100)
+        self.stats_rect = pygame.Rect(350, 50, 400, 500)
 
     def setup_gemini(self):
         genai.configure(api_key='YOUR_GEMINI_API_KEY_HERE')
         self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        self.retry_config = retry.Retry(
+        # Nobody waits on a hint, narration or analysis past LIVE_TIMEOUT, so their workers shouldn't keep retrying either
+        self.live_retry = retry.Retry(
             initial=1.0,  # Initial retry delay in seconds
-            maximum=60.0,  # Maximum retry delay
-            multiplier=2.0,  # Delay multiplier
+            maximum=4.0,
+            multiplier=2.0,
             predicate=retry.if_exception_type(ResourceExhausted),
-            deadline=300.0  # Overall deadline for retries
+            deadline=LIVE_TIMEOUT
         )
+        self.gemini_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="gemini")
+        self.responses = response_cache.ResponseCache()  # Gemini's answers for positions seen before
+        # One worker, so narration for moves the player has already made waits in the queue and can be cancelled
+        self.narration_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="narration")
 
-    def draw(self):
-        self.screen.blit(self.background, (0, 0))
-        
-        self.draw_shore(self.left_shore, 50, True)
-        self.draw_shore(self.right_shore, 700, False)
+    def build_scene(self):
+        """One sprite per character, plus the boat, buttons, labels and overlay panels"""
+        self.boat_sprite = render.SceneSprite(self.boat_img, (self.boat_x, 500), BOARD_LAYER)
+        self.character_sprites = {
+            "priests": [CharacterSprite(self.priest_img, "priests") for _ in range(self.puzzle.priests)],
+            "carnivores": [CharacterSprite(self.carnivore_img, "carnivores") for _ in range(self.puzzle.carnivores)],
+        }
+        self.passenger_slots = []  # (sprite, x offset from the boat, y) for everyone on the boat
+        self.scene_state_code = None  # State the character sprites were last laid out for
         
-        self.screen.blit(self.boat_img, (self.boat_x, 500))
+        self.button_images = {}
+        self.button_sprites = {}
+        for name, button_rect, text, layer in [
+            ("move_boat", self.move_boat_button, "Move Boat", BOARD_LAYER),
+            ("hint", self.hint_button, "Hint", BOARD_LAYER),
+            ("narrate", self.narrate_button, self.narration_label(), BOARD_LAYER),
+            ("stats", self.stats_button, "Show Stats", BOARD_LAYER),
+            ("play_again", self.play_again_button, "Play Again", GAME_OVER_BUTTON_LAYER),
+            ("try_again", self.try_again_button, "Try Again", GAME_OVER_BUTTON_LAYER),
+            ("end_game", self.end_game_button, "End Game", GAME_OVER_BUTTON_LAYER),
+        ]:
+            self.button_sprites[name] = render.SceneSprite(self.button_image(text), button_rect.topleft, layer,
+                                                           visible=layer == BOARD_LAYER, clickable=True)
         
-        for i, character in enumerate(["carnivores", "priests"]):
-            for j in range(self.boat[character]):
-                self.screen.blit(self.carnivore_img if character == "carnivores" else self.priest_img,
-                                 (self.boat_x + 10 + j * 55, 460 + i * 50))
+        empty = pygame.Surface((0, 0))
+        self.status_sprite = render.SceneSprite(empty, (10, 10), BOARD_LAYER)
+        self.best_score_sprite = render.SceneSprite(empty, (10, 50), BOARD_LAYER, visible=False)
+        self.game_over_sprite = render.SceneSprite(empty, (0, 0), GAME_OVER_LAYER, visible=False)
+        self.hint_sprite = render.SceneSprite(empty, self.hint_rect.topleft, OVERLAY_LAYER, visible=False)
+        self.narration_sprite = render.SceneSprite(empty, self.narration_rect.topleft, OVERLAY_LAYER, visible=False)
+        self.stats_sprite = render.SceneSprite(empty, self.stats_rect.topleft, OVERLAY_LAYER, visible=False)
+        self.profiler_sprite = render.SceneSprite(empty, (10, 90), PROFILER_LAYER, visible=False)
+        self.profiler_drawn_at = 0.0
         
-        self.draw_button(self.move_boat_button, "Move Boat")
+        self.renderer.add(self.boat_sprite, *self.character_sprites["priests"],
+                          *self.character_sprites["carnivores"], *self.button_sprites.values(),
+                          self.status_sprite, self.best_score_sprite, self.game_over_sprite,
+                          self.hint_sprite, self.narration_sprite, self.stats_sprite, self.profiler_sprite)
+
+    def narration_label(self):
+        return "Narration: ON" if self.narration_enabled else "Narration: OFF"
+
+    def button_image(self, text):
+        """Button background with its label centered, built once per label"""
+        image = self.button_images.get(text)
+        if image is None:
+            image = self.button_img.copy()
+            text_surf = self.text_cache.render(self.button_font, text, (255, 255, 255))  # White text
+            image.blit(text_surf, text_surf.get_rect(center=image.get_rect().center))
+            self.button_images[text] = image
+        return image
+
+    def draw(self, alpha=1.0):
+        """Redraw the sprites that changed since the last frame.
+
+        alpha is how far real time has got between the last two simulation
+        steps; the moving boat is drawn that far between its two positions.
+        """
+        boat_x = self.boat_x
+        if self.moving_boat:
+            boat_x = self.previous_boat_x + (self.boat_x - self.previous_boat_x) * alpha
+        self.drawn_boat_x = boat_x
+        with self.profiler.phase("draw.sync"):
+            self.sync_scene()
+        self.update_profiler_overlay()
+        self.renderer.render()
+
+    def update_profiler_overlay(self):
+        if self.profiler.enabled:
+            now = time.perf_counter()
+            if now - self.profiler_drawn_at >= PROFILER_REFRESH:
+                with self.profiler.phase("draw.profiler"):
+                    self.profiler_sprite.set_image(self.profiler.render_overlay(self.stats_font))
+                self.profiler_drawn_at = now
+        self.profiler_sprite.show(self.profiler.enabled)
+
+    def sync_scene(self):
+        """Bring the sprites in line with the game; only sprites that change get redrawn"""
+        if self.state_code != self.scene_state_code:
+            self.layout_characters()
+            self.scene_state_code = self.state_code
+        self.place_boat(self.drawn_boat_x)
         
         # Combined Firebase status and moves counter
         if self.db is not None:
-            moves_text = self.font.render(f"Moves: {self.moves} | Firebase: Connected", True, (255, 255, 255))
-            self.screen.blit(moves_text, (10, 10))
+            status = self.text_cache.render(self.font, f"Moves: {self.moves} | Firebase: Connected", (255, 255, 255))
         else:
-            error_text = self.font.render("Firebase: Disconnected", True, (255, 0, 0))  # Red text
-            self.screen.blit(error_text, (10, 10))
+            status = self.text_cache.render(self.font, "Firebase: Disconnected", (255, 0, 0))  # Red text
+        self.status_sprite.set_image(status)
+        if self._best_score is not None:
+            self.best_score_sprite.set_image(
+                self.text_cache.render(self.font, f"Best: {self._best_score}", (255, 255, 255)))
+        self.best_score_sprite.show(self._best_score is not None)
         
-        # Add scores display
-        self.draw_scores()
+        self.button_sprites["narrate"].set_image(self.button_image(self.narration_label()))
+        # Once the game is over the side buttons stay above the dimmed board
+        for name in ("hint", "narrate", "stats"):
+            self.renderer.set_layer(self.button_sprites[name], GAME_OVER_BUTTON_LAYER if self.game_over else BOARD_LAYER)
+        self.button_sprites["play_again"].show(self.game_over and self.win)
+        self.button_sprites["try_again"].show(self.game_over and not self.win)
+        self.button_sprites["end_game"].show(self.game_over and not self.win)
         
         if self.game_over:
             if not self.game_over_screen_drawn:  # Only print once
-                print("Drawing game over screen")  # Debug print
+                render_log.debug("Drawing game over screen")
                 self.game_over_screen_drawn = True
-            self.draw_game_over_screen()
+            self.game_over_sprite.set_image(self.game_over_panel.get((self.win, self.moves)))
+        self.game_over_sprite.show(self.game_over)
         
-        self.draw_button(self.hint_button, "Hint")
-        self.draw_button(self.narrate_button, "Narration: ON" if self.narration_enabled else "Narration: OFF")
-        self.draw_button(self.stats_button, "Show Stats")
+        show_hint = bool(self.hint) and (self.hint_timer > 0 or self.hint_request is not None)
+        if show_hint:
+            self.hint_sprite.set_image(self.hint_panel.get(self.hint))
+        self.hint_sprite.show(show_hint)
         
-        self.draw_hint()
-        self.draw_narration()
+        show_narration = bool(self.narration) and self.narration_timer > 0
+        if show_narration:
+            self.narration_sprite.set_image(self.narration_panel.get(self.narration))
+        self.narration_sprite.show(show_narration)
         
-        # Draw analytics if showing
-        if hasattr(self, 'show_stats') and self.show_stats and hasattr(self, 'last_analytics'):
-            if hasattr(self, 'analytics_surface'):
-                self.screen.blit(self.analytics_surface, (350, 50))
-        
-        pygame.display.flip()
+        show_stats = getattr(self, 'show_stats', False) and hasattr(self, 'analytics_surface')
+        if show_stats:
+            self.stats_sprite.set_image(self.analytics_surface)
+        self.stats_sprite.show(show_stats)
+
+    def layout_characters(self):
+        """Move every character sprite to where the current state puts it.
 
-    def draw_shore(self, shore, x, is_left):
-        for i, character in enumerate(["carnivores", "priests"]):
-            for j in range(shore[character]):
-                if is_left:
-                    pos_x = x - 30 + j * 60  # Moved left side sprites 30 pixels to the left
+        Sprites fill the left shore from the first one, the right shore
+        from the last one and the boat in between, so a move only
+        relocates the character that actually moved. Bigger puzzles
+        squeeze the spacing so everyone stays on screen; past about 16
+        of a kind on a shore the sprites overlap too much to click reliably.
+        """
+        self.passenger_slots = []
+        boat_step = min(55, (BOAT_SPAN - CHARACTER_SIZE) / max(1, self.puzzle.capacity - 1))
+        for row, character in enumerate(["carnivores", "priests"]):
+            sprites = self.character_sprites[character]
+            shore_step = min(60, (SHORE_WIDTH - CHARACTER_SIZE) / max(1, len(sprites) - 1))
+            on_left = self.left_shore[character]
+            on_boat = self.boat[character]
+            for index, sprite in enumerate(sprites):
+                if index < on_left:
+                    sprite.place = engine.LEFT
+                    sprite.move_to((20 + index * shore_step, 400 + row * 60))
+                elif index < on_left + on_boat:
+                    sprite.place = "boat"
+                    self.passenger_slots.append((sprite, 10 + (index - on_left) * boat_step, 460 + row * 50))
                 else:
-                    pos_x = x + 100 - (j + 1) * 60
-                self.screen.blit(self.carnivore_img if character == "carnivores" else self.priest_img,
-                                 (pos_x, 400 + i * 60))
+                    sprite.place = engine.RIGHT
+                    sprite.move_to((740 - (len(sprites) - 1 - index) * shore_step, 400 + row * 60))
 
-    def draw_button(self, button_rect, text):
-        self.screen.blit(self.button_img, button_rect)
-        text_surf = self.button_font.render(text, True, (255, 255, 255))  # White text
-        text_rect = text_surf.get_rect(center=button_rect.center)
-        self.screen.blit(text_surf, text_rect)
+    def place_boat(self, boat_x):
+        self.boat_sprite.move_to((boat_x, 500))
+        for sprite, x_offset, y in self.passenger_slots:
+            sprite.move_to((boat_x + x_offset, y))
 
-    def draw_game_over_screen(self):
+    def build_game_over_panel(self, key):
+        win, moves = key
         overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 128))
-        self.screen.blit(overlay, (0, 0))
-        
-        if self.win:
-            text = self.font.render(f"Congratulations! You've won in {self.moves} moves.", True, (255, 255, 255))
-            text_rect = text.get_rect(center=(self.width // 2, 200))
-            self.screen.blit(text, text_rect)
-            
-            play_again_button = pygame.Rect(0, 0, 120, 50)
-            play_again_button.center = (self.width // 2, 300)  # Centered and moved down by 150 pixels
-            self.draw_button(play_again_button, "Play Again")
-            self.try_again_button = play_again_button  # Update the button rect for click detection
+        if win:
+            message = f"Congratulations! You've won in {moves} moves."
         else:
-            text = self.font.render("Game over! The carnivores have eaten the priests.", True, (255, 255, 255))
-            text_rect = text.get_rect(center=(self.width // 2, 200))
-            self.screen.blit(text, text_rect)
-            
-            self.draw_button(self.try_again_button, "Try Again")
-            self.draw_button(self.end_game_button, "End Game")
+            message = "Game over! The carnivores have eaten the priests."
+        text = self.text_cache.render(self.font, message, (255, 255, 255))
+        overlay.blit(text, text.get_rect(center=(self.width // 2, 200)))
+        return overlay
 
     def handle_click(self, pos):
-        x, y = pos
-        print(f"Click at position: {pos}")  # Debug print
+        engine_log.debug("Click at position: %s", pos)
+        sprite = self.renderer.sprite_at(pos)
+        buttons = self.button_sprites
         
         if self.game_over:
-            if self.try_again_button.collidepoint(pos):
+            # Only the restart buttons for this outcome are visible, so only they can be hit
+            if sprite is buttons["play_again"] or sprite is buttons["try_again"]:
                 self.reset_game()
-            elif self.end_game_button.collidepoint(pos) and not self.win:
+            elif sprite is buttons["end_game"]:
                 pygame.quit()
                 sys.exit()
-        else:
-            if self.move_boat_button.collidepoint(pos) and not self.moving_boat:
+        elif sprite is buttons["move_boat"]:
+            if not self.moving_boat:
                 self.start_boat_movement()
-            else:
-                self.handle_character_click(x, y)
+        elif isinstance(sprite, CharacterSprite):
+            self.handle_character_click(sprite)
         
-        if self.hint_button.collidepoint(pos):
+        if sprite is buttons["hint"]:
             self.get_hint()
-        elif self.narrate_button.collidepoint(pos):
+        elif sprite is buttons["narrate"]:
             self.narration_enabled = not self.narration_enabled
-        elif self.stats_button.collidepoint(pos):
-            print("Stats button clicked!")  # Debug print
+        elif sprite is buttons["stats"]:
+            render_log.debug("Stats button clicked")
             if not hasattr(self, 'show_stats'):
-                print("Initializing show_stats")  # Debug print
+                render_log.debug("Initializing show_stats")
                 self.show_stats = True
                 self.get_game_analytics()
             else:
-                print(f"Toggling show_stats from {self.show_stats} to {not self.show_stats}")  # Debug print
+                render_log.debug("Toggling show_stats from %s to %s", self.show_stats, not self.show_stats)
                 self.show_stats = not self.show_stats
                 if self.show_stats:
                     self.get_game_analytics()
 
-    def handle_character_click(self, x, y):
-        shore = self.left_shore if self.boat_position == "left" else self.right_shore
-        shore_x = 20 if self.boat_position == "left" else 800  # Adjusted left shore x to match new position
-        boat_chars = sum(self.boat.values())
-
-        print(f"Click at ({x}, {y})")  # Debug print
-
-        # Check if clicking on the boat
-        if self.boat_x < x < self.boat_x + 100 and 460 < y < 560:
-            print("Clicked on boat")  # Debug print
-            if 460 < y < 510 and self.boat["carnivores"] > 0:
-                self.move_character("carnivores", from_boat=True)
-            elif 510 < y < 560 and self.boat["priests"] > 0:
-                self.move_character("priests", from_boat=True)
-        # Check if clicking on the shore
-        else:
-            shore_width = 210  # Increased to account for the wider clickable area on the left
-            shore_start = shore_x - shore_width if self.boat_position == "right" else shore_x
-            shore_end = shore_start + shore_width
-
-            print(f"Shore area: {shore_start} to {shore_end}")  # Debug print
-            
-            if shore_start <= x <= shore_end:
-                print("Clicked on shore")  # Debug print
-                if 400 <= y < 450 and shore["carnivores"] > 0 and boat_chars < 2:
-                    self.move_character("carnivores", from_boat=False)
-                elif 450 <= y < 500 and shore["priests"] > 0 and boat_chars < 2:
-                    self.move_character("priests", from_boat=False)
+    def handle_character_click(self, sprite):
+        engine_log.debug("Clicked %s at %s", sprite.character, sprite.place)
+        
+        if self.moving_boat:
+            return  # Nobody boards or lands mid-crossing; an empty boat couldn't finish the crossing
+        
+        if sprite.place == "boat":
+            self.move_character(sprite.character, from_boat=True)
+        elif sprite.place == self.boat_position:
+            self.move_character(sprite.character, from_boat=False)
 
-        print(f"After click - Boat: {self.boat}, Left Shore: {self.left_shore}, Right Shore: {self.right_shore}")  # Debug print
+        if engine_log.isEnabledFor(logging.DEBUG):
+            engine_log.debug("After click - Boat: %s, Left Shore: %s, Right Shore: %s",
+                             self.boat, self.left_shore, self.right_shore)
 
     def move_character(self, character, from_boat=False):
-        shore = self.left_shore if self.boat_position == "left" else self.right_shore
-        if from_boat:
-            if self.boat[character] > 0:
-                self.boat[character] -= 1
-                shore[character] += 1
-                print(f"Moved {character} from boat to shore")  # Debug print
-        else:
-            if shore[character] > 0 and sum(self.boat.values()) < 2:
-                shore[character] -= 1
-                self.boat[character] += 1
-                print(f"Moved {character} from shore to boat")  # Debug print
+        move = engine.Move(engine.LAND if from_boat else engine.BOARD, character)
+        if self.apply_move(move):
+            if from_boat:
+                engine_log.debug("Moved %s from boat to shore", character)
             else:
-                print(f"Failed to move {character} - Shore: {shore[character]}, Boat: {sum(self.boat.values())}")  # Debug print
-        
-        self.check_game_state()  # Check game state after every movement
+                engine_log.debug("Moved %s from shore to boat", character)
+        elif not from_boat:
+            shore = self.left_shore if self.boat_position == "left" else self.right_shore
+            engine_log.debug("Failed to move %s - Shore: %s, Boat: %s", character, shore[character], engine.boat_load(self.state))
+
+    def apply_move(self, move):
+        """Advance the engine state and publish what changed. False if the move is not legal"""
+        before = self.state_code
+        after = self.codec.encode(engine.apply_move(self.state, move, self.puzzle))
+        if after == before:
+            return False
         
-        # Get narration after the move if enabled
-        if self.narration_enabled:
-            self.get_narration()
+        wasted = False
+        if move.action == engine.CROSS:
+            self.moves += 1
+            distance_before = self.distance_oracle.distance_to_goal(self.codec.decode(before))
+            distance_after = self.distance_oracle.distance_to_goal(self.codec.decode(after))
+            # Every crossing changes the distance by exactly one, so this is either progress or two wasted moves
+            wasted = (distance_before is not None and distance_after is not None and
+                      distance_after > distance_before)
+            self.last_crossing_wasted = wasted
+        self.state_code = after
         
-        # Update last move state
-        self.last_move_state = self.get_game_state_string()
+        duration = time.time() - self.start_time
+        for event in events.events_for_move(self.codec, before, move, after, self.moves, wasted, duration):
+            self.events.publish(event)
+        return True
 
     def start_boat_movement(self):
-        if sum(self.boat.values()) > 0:
+        if self.db is None and not self.offline:
+            # Checked here rather than at the far shore, where it would repeat every step with the boat stuck
+            firebase_log.warning("Cannot update moves - Firebase not connected")
+            return
+        if engine.is_legal(self.state, engine.CROSS_BOAT, self.puzzle):
             self.moving_boat = True
 
-    def update_boat_position(self):
+    def advance(self, elapsed):
+        """Run as many fixed simulation steps as elapsed real seconds allow.
+
+        Returns the fraction of a step left over, for interpolating the frame.
+        """
+        # Once per frame, not per step: a frame woken by a finished request may have no step to run
+        self.poll_hint()
+        self.poll_narration()
+        self.poll_speech()
+        self.poll_analytics()
+        self.sim_accumulator += elapsed
+        while self.sim_accumulator >= SIM_STEP:
+            self.update(SIM_STEP)
+            self.sim_accumulator -= SIM_STEP
+        return self.sim_accumulator / SIM_STEP
+
+    def update(self, dt):
+        """Advance game time by dt seconds"""
+        self.previous_boat_x = self.boat_x
+        self.update_boat_position(dt)
+        
+        if self.hint_timer > 0:
+            self.hint_timer = max(0, self.hint_timer - dt)
+        if self.narration_timer > 0:
+            self.narration_timer = max(0, self.narration_timer - dt)
+
+    def update_boat_position(self, dt):
         if self.moving_boat:
             if self.boat_position == "left":
-                self.boat_x += self.boat_speed
+                self.boat_x = min(500, self.boat_x + self.boat_speed * dt)
                 if self.boat_x >= 500:
                     self.finish_boat_movement()
             else:
-                self.boat_x -= self.boat_speed
+                self.boat_x = max(200, self.boat_x - self.boat_speed * dt)
                 if self.boat_x <= 200:
                     self.finish_boat_movement()
-        
-        if self.hint_timer > 0:
-            self.hint_timer -= 1
-        if self.narration_timer > 0:
-            self.narration_timer -= 1
 
     def finish_boat_movement(self):
-        if self.db is None:
-            print("Cannot update moves - Firebase not connected")
-            return
-            
-        self.boat_position = "right" if self.boat_position == "left" else "left"
-        self.moves += 1
         self.moving_boat = False
-        print(f"Boat movement finished. Position: {self.boat_position}, Moves: {self.moves}")
-        self.check_game_state()
-        
-        # Save moves after each boat movement
-        self.save_moves_to_firebase()
+        self.apply_move(engine.CROSS_BOAT)
+
+    def on_boat_crossed(self, event):
+        engine_log.debug("Boat movement finished. Position: %s, Moves: %s", event.shore, event.moves)
         
-        if self.narration_enabled:
+        # Keep the "Your Game" lines of an open stats panel current
+        if getattr(self, 'show_stats', False) and hasattr(self, 'last_analytics'):
+            self.display_analytics(self.last_analytics)
+
+    def on_move_narration(self, event):
+        self.narration_version += 1
+        if self.narration_enabled and not self.offline:
             self.get_narration()
-        
-        self.last_move_state = self.get_game_state_string()
 
-    def check_game_state(self):
-        if self.is_win_state():
-            self.game_over = True
-            self.win = True
-            # Save final game state to Firebase
-            self.save_moves_to_firebase()
-            print("Game over: Win state")
-        elif not self.is_valid_state():
-            self.game_over = True
-            self.win = False
-            # Save final game state to Firebase
-            self.save_moves_to_firebase()
-            print("Game over: Invalid state")
-        print(f"Game state checked - Game over: {self.game_over}, Win: {self.win}")
-        print(f"Current state - Left: {self.left_shore}, Right: {self.right_shore}, Boat: {self.boat}, Boat position: {self.boat_position}")
+    def on_game_over(self, event):
+        self.game_over = True
+        self.win = isinstance(event, events.GameWon)
+        engine_log.info("Game over: %s", "Win state" if self.win else "Invalid state")
+
+    def on_game_reset(self, event):
+        # Resets after __init__ always follow a finished game, so open a new session for the next one
+        if self.db:
+            self.create_game_session()
 
     def is_valid_state(self):
-        for shore in [self.left_shore, self.right_shore]:
-            shore_priests = shore["priests"]
-            shore_carnivores = shore["carnivores"]
-            if self.boat_position == "left" and shore == self.left_shore:
-                shore_priests += self.boat["priests"]
-                shore_carnivores += self.boat["carnivores"]
-            elif self.boat_position == "right" and shore == self.right_shore:
-                shore_priests += self.boat["priests"]
-                shore_carnivores += self.boat["carnivores"]
-            if shore_priests > 0 and shore_carnivores > shore_priests:
-                return False
-        return True
+        return engine.is_valid(self.state, self.puzzle)
 
     def is_win_state(self):
-        win_condition = (self.right_shore["priests"] == 3 and 
-                         self.right_shore["carnivores"] == 3 and
-                         self.left_shore["priests"] == 0 and 
-                         self.left_shore["carnivores"] == 0 and
-                         self.boat["priests"] == 0 and 
-                         self.boat["carnivores"] == 0 and
-                         self.boat_position == "right")
-        print(f"Win state check:")
-        print(f"Right shore: {self.right_shore}")
-        print(f"Left shore: {self.left_shore}")
-        print(f"Boat: {self.boat}")
-        print(f"Boat position: {self.boat_position}")
-        print(f"Win condition met: {win_condition}")
+        win_condition = engine.is_win(self.state)
+        if engine_log.isEnabledFor(logging.DEBUG):
+            engine_log.debug("Win state check: %s (right shore %s, left shore %s, boat %s at %s)", win_condition,
+                             self.right_shore, self.left_shore, self.boat, self.boat_position)
         return win_condition
 
     def get_hint(self):
-        game_state = self.get_game_state_string()
+        if self.hint_request is not None:
+            return  # Still thinking about the last one
+        move_index = self.distance_oracle.next_moves[self.distance_oracle.index(solver.position_of(self.state))]
+        load = self.hint_loads[move_index] if move_index >= 0 else None
         
-        # Create a solution map based on game state patterns
-        solution_hints = {
-            # Initial state
-            "left:3p3c_right:0p0c_boat:left": "Consider moving 1 priest and 1 carnivore to start safely.",
-            
-            # After first move (1p1c right)
-            "left:2p2c_right:1p1c_boat:right": "Bring the priest back, leaving the carnivore on the right shore.",
-            
-            # After priest returns
-            "left:3p2c_right:0p1c_boat:left": "Take 2 carnivores to the right shore now.",
-            
-            # After 2 carnivores moved right
-            "left:3p0c_right:0p3c_boat:right": "Bring 1 carnivore back to balance the shores.",
-            
-            # After carnivore returns
-            "left:3p1c_right:0p2c_boat:left": "Now it's safe to move 2 priests to the right.",
-            
-            # After 2 priests moved right
-            "left:1p1c_right:2p2c_boat:right": "Return with 1 priest and 1 carnivore to help the remaining group.",
-            
-            # After priest and carnivore return
-            "left:2p2c_right:1p1c_boat:left": "Take the remaining 2 priests to the right shore.",
-            
-            # After 2 priests moved right
-            "left:0p2c_right:3p1c_boat:right": "Move 1 carnivore to the left to help with final crossing.",
-            
-            # After carnivore moved left
-            "left:0p3c_right:3p0c_boat:left": "Take 2 carnivores to the right shore.",
-            
-            # After 2 carnivores moved right
-            "left:0p1c_right:3p2c_boat:right": "One last trip: bring back 1 carnivore.",
-            
-            # Final move setup
-            "left:0p2c_right:3p1c_boat:left": "Final move: take the last 2 carnivores across!",
-        }
-        
-        # Create a simplified state key
-        current_state_key = f"left:{self.left_shore['priests']}p{self.left_shore['carnivores']}c_" \
-                           f"right:{self.right_shore['priests']}p{self.right_shore['carnivores']}c_" \
-                           f"boat:{self.boat_position}"
-        
-        # Get the appropriate hint based on the current state
-        hint = solution_hints.get(current_state_key, None)
+        if self.is_win_state():
+            hint = "All across - you've solved the puzzle!"
+        elif self.distance_oracle.distance_to_goal(self.state) == 0:
+            # Everyone is across but some are still in the boat; no crossing is left to suggest
+            hint = "Everyone is across - land the boat's passengers to finish!"
+        elif load is None:
+            # The table has no crossing for the goal itself or for positions that can no longer be won
+            hint = "Focus on maintaining balance between priests and carnivores on both shores."
+        elif self.offline:
+            hint = solver.describe_move(load, self.boat_position)
+        else:
+            # The move itself comes from the solver; Gemini only rewords it
+            move_text = solver.describe_move(load, self.boat_position)
+            key = response_cache.state_key(self.puzzle, self.state)
+            hint = self.responses.get("hint", key)
         
-        if not hint:
-            # If state not found in solution map, generate a general strategic hint
+        if hint is None:
             prompt = f"""
             You are an AI assistant for the Lake Crossing Game. The current game state is:
-            {game_state}
-            
-            Based on this optimal solution sequence:
-            1. Move 1 priest and 1 carnivore right
-            2. Return priest, leave carnivore right
-            3. Move 2 carnivores right
-            4. Return 1 carnivore
-            5. Move 2 priests right
-            6. Return 1 priest and 1 carnivore
-            7. Move 2 priests right
-            8. Move 1 carnivore left
-            9. Move 2 carnivores right
-            10. Return 1 carnivore
-            11. Move final 2 carnivores right
-            
-            Provide a strategic hint that:
+            {self.get_board_string()}
+            
+            The next optimal move is: {move_text}
+            
+            Rephrase this move as a friendly, strategic hint that:
             1. Is concise (max 100 characters)
-            2. Guides towards the next optimal move
-            3. Maintains safety (never more carnivores than priests)
-            4. Focuses on progress towards the goal
+            2. Keeps exactly the same move - do not suggest anything else
+            3. Mentions safety (never more carnivores than priests) if it fits
             
             Hint:
             """
             
+            # Gemini can take minutes when rate limited, so it answers on the pool and poll_hint picks it up
+            future = self.gemini_pool.submit(self.request_hint, prompt, key)
+            future.add_done_callback(lambda future: self.wake())
+            self.hint_request = (future, self.state_code, move_text, time.monotonic() + LIVE_TIMEOUT)
+            # Wake an idle loop just after the deadline to give up on it
+            pygame.time.set_timer(WAKE_EVENT, int(LIVE_TIMEOUT * 1000) + 50, 1)
+            self.show_hint(THINKING_TEXT, speak=False)
+            return
+        
+        self.show_hint(hint)
+
+    def request_hint(self, prompt, key):
+        """Gemini's wording of a hint. Runs on the worker pool, so it must not touch pygame or game state"""
+        texts = self.generate_variants(self.live_retry, prompt, LIVE_TIMEOUT)
+        self.responses.put("hint", key, texts)
+        return texts[0] if texts else ""
+
+    def generate_variants(self, retry_config, prompt, timeout=None):
+        """Every candidate Gemini writes for prompt, one per variant the response cache keeps"""
+        request_options = {"timeout": timeout} if timeout else None
+        response = retry_config(self.model.generate_content)(
+            prompt, generation_config={"candidate_count": self.responses.variants}, request_options=request_options)
+        texts = []
+        for candidate in response.candidates:
+            text = "".join(part.text for part in candidate.content.parts).strip()
+            if text:
+                texts.append(text)
+        return texts
+
+    def poll_hint(self):
+        """Show the pending hint once Gemini has answered, or the solver's wording once it has taken too long"""
+        if self.hint_request is None:
+            return
+        future, state_code, move_text, deadline = self.hint_request
+        if future.done():
             try:
-                response = self.retry_config(self.model.generate_content)(prompt)
-                hint = response.text.strip()
+                hint = future.result() or move_text
             except Exception as e:
-                print(f"Error getting hint: {e}")
-                hint = "Focus on maintaining balance between priests and carnivores on both shores."
+                gemini_log.warning("Error getting hint: %s", e)
+                hint = move_text
+        elif time.monotonic() >= deadline:
+            gemini_log.warning("No hint from Gemini after %s seconds, using the solver's wording", LIVE_TIMEOUT)
+            future.cancel()  # Only stops it if it hasn't started yet
+            hint = move_text
+        else:
+            return
         
+        self.hint_request = None
+        if state_code != self.state_code:
+            self.hint = ""  # The player has moved since asking, so the hint no longer applies
+            return
+        self.show_hint(hint)
+
+    def show_hint(self, hint, speak=True):
         self.hint = hint
-        self.hint_timer = 300  # Display hint for 5 seconds
+        self.hint_timer = OVERLAY_SECONDS
         
         # Speak the hint if text-to-speech is enabled
-        if self.narration_enabled:
-            self.speak_text(self.hint)
+        if speak and self.narration_enabled and self.tts_client is not None:
+            self.speak_later(self.hint)
+
+    def speak_later(self, text):
+        """Synthesize text on the worker pool; poll_speech plays it once it's ready"""
+        if self.speech_request is not None:
+            self.speech_request.cancel()  # Only the latest hint is worth hearing
+        self.speech_request = self.gemini_pool.submit(self.synthesize_speech, text)
+        self.speech_request.add_done_callback(lambda future: self.wake())
+
+    def poll_speech(self):
+        if self.speech_request is None or not self.speech_request.done():
+            return
+        future = self.speech_request
+        self.speech_request = None
+        if not future.cancelled():
+            self.play_speech(future.result())  # synthesize_speech logs its own errors and returns None
 
     def get_narration(self):
-        current_state = self.get_game_state_string()
+        current_state = self.get_board_string()
         
         prompt = f"""
         You are a creative and enthusiastic commentator for the Lake Crossing Game. You act as the voiceover for the particular game character that moves and speak on their behalf as if it was a real being. The current game state is:
@@ -580,63 +840,75 @@ class LakeCrossingGame:
         Narration (max 100 characters):
         """
 
+        if self.narration_request is not None:
+            self.narration_request[0].cancel()  # Only stops it if it hasn't started; write_narration checks the rest
+        key = response_cache.state_key(self.puzzle, self.state)
+        future = self.narration_pool.submit(self.write_narration, prompt, key, self.narration_version)
+        future.add_done_callback(lambda future: self.wake())
+        self.narration_request = (future, self.narration_version)
+
+    def write_narration(self, prompt, key, version):
+        """(text, speech audio or None) for one move, or None once a newer move has made it stale.
+
+        Runs on the narration worker, so it must not touch pygame.
+        """
+        if version != self.narration_version:
+            return None
+        text = self.responses.get("narration", key)
+        if text is None:
+            try:
+                texts = self.generate_variants(self.live_retry, prompt, LIVE_TIMEOUT)
+                self.responses.put("narration", key, texts)
+                text = texts[0] if texts else NARRATION_FALLBACK
+            except Exception as e:
+                gemini_log.warning("Error getting narration: %s", e)
+                text = NARRATION_FALLBACK
+        if version != self.narration_version:
+            return None  # Don't synthesize speech nobody will hear
+        return text, self.synthesize_speech(text)
+
+    def poll_narration(self):
+        """Show and speak the narration once it's written, if it's still for the latest move"""
+        if self.narration_request is None or not self.narration_request[0].done():
+            return
+        future, version = self.narration_request
+        self.narration_request = None
         try:
-            response = self.retry_config(self.model.generate_content)(prompt)
-            self.narration = response.text.strip()
-            self.narration_timer = 300
-            
-            # Add this line to speak the narration
-            self.speak_text(self.narration)
-            
-        except Exception as e:
-            print(f"Error getting narration: {e}")
-            self.narration = "The tension rises as the journey continues..."
-            self.narration_timer = 300
-            self.speak_text(self.narration)
+            result = future.result()
+        except Exception:
+            gemini_log.exception("Error writing narration")
+            return
+        if result is None or version != self.narration_version or not self.narration_enabled:
+            return
+        self.narration, audio = result
+        self.narration_timer = OVERLAY_SECONDS
+        self.play_speech(audio)
 
-    def get_game_state_string(self):
-        return f"""
-        Left shore: {self.left_shore}
-        Right shore: {self.right_shore}
-        Boat: {self.boat}
-        Boat position: {self.boat_position}
-        Moves: {self.moves}
+    def get_game_state_string(self, state_code=None, moves=None):
+        return f"""{self.get_board_string(state_code)}
+        Moves: {self.moves if moves is None else moves}
         """
 
-    def draw_hint(self):
-        if self.hint and self.hint_timer > 0:
-            hint_surface = pygame.Surface((600, 100), pygame.SRCALPHA)
-            hint_surface.fill((0, 0, 0, 180))
-            wrapped_text = textwrap.wrap(self.hint, width=70)  # Increased width for wrapping
-            y_offset = 10
-            for line in wrapped_text:
-                hint_text = self.hint_font.render(line, True, (255, 255, 255))
-                hint_rect = hint_text.get_rect(center=(300, 20 + y_offset))
-                hint_surface.blit(hint_text, hint_rect)
-                y_offset += 25  # Reduced vertical spacing
-            self.screen.blit(hint_surface, (100, 450))
-
-    def draw_narration(self):
-        if self.narration and self.narration_timer > 0:
-            narration_surface = pygame.Surface((700, 100), pygame.SRCALPHA)
-            narration_surface.fill((0, 0, 0, 180))
-            wrapped_text = textwrap.wrap(self.narration, width=80)  # Increased width for wrapping
-            y_offset = 10
-            for line in wrapped_text:
-                narration_text = self.hint_font.render(line, True, (255, 255, 255))
-                narration_rect = narration_text.get_rect(center=(350, 20 + y_offset))
-                narration_surface.blit(narration_text, narration_rect)
-                y_offset += 25  # Reduced vertical spacing
-            self.screen.blit(narration_surface, (50, 50))
-
-    def draw_scores(self):
-        """Draw best score and recent games on screen"""
-        if not hasattr(self, '_best_score'):
-            self._best_score = self.fetch_best_score_from_firebase()
-        
-        if self._best_score is not None:
-            best_score_text = self.font.render(f"Best: {self._best_score}", True, (255, 255, 255))
-            self.screen.blit(best_score_text, (10, 50))
+    def get_board_string(self, state_code=None):
+        """Where everyone is, without the move count, so the same position always reads the same"""
+        state = self.codec.decode(self.state_code if state_code is None else state_code)
+        right_priests, right_carnivores = engine.right_shore(state, self.puzzle)
+        return f"""
+        Left shore: {{'priests': {state.left_priests}, 'carnivores': {state.left_carnivores}}}
+        Right shore: {{'priests': {right_priests}, 'carnivores': {right_carnivores}}}
+        Boat: {{'priests': {state.boat_priests}, 'carnivores': {state.boat_carnivores}}}
+        Boat position: {state.boat_position}"""
+
+    def build_text_panel(self, text, size, wrap_width):
+        """Translucent panel with text wrapped and centered line by line"""
+        panel = pygame.Surface(size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        y_offset = 10
+        for line in textwrap.wrap(text, width=wrap_width):
+            line_text = self.text_cache.render(self.hint_font, line, (255, 255, 255))
+            panel.blit(line_text, line_text.get_rect(center=(size[0] // 2, 20 + y_offset)))
+            y_offset += 25  # Reduced vertical spacing
+        return panel
 
     def fetch_best_score_from_firebase(self):
         """Fetch the best (lowest) number of moves from winning games"""
@@ -647,16 +919,17 @@ class LakeCrossingGame:
             # Query winning games, ordered by moves
             games_ref = self.db.collection('game_sessions')
             query = games_ref.where('win', '==', True).order_by('moves').limit(1)
-            docs = query.get()
+            with self.profiler.phase("network"):
+                docs = query.get()
             
             for doc in docs:
                 best_score = doc.to_dict()
-                print(f"Best score fetched: {best_score['moves']} moves")
+                firebase_log.debug("Best score fetched: %s moves", best_score['moves'])
                 return best_score['moves']
             
             return None  # Return None if no winning games found
         except Exception as e:
-            print(f"Error fetching best score: {e}")
+            firebase_log.error("Error fetching best score: %s", e)
             return None
 
     def fetch_recent_games_from_firebase(self, limit=5):
@@ -674,11 +947,11 @@ class LakeCrossingGame:
             for doc in docs:
                 game_data = doc.to_dict()
                 recent_games.append(game_data)
-                print(f"Recent game: {game_data['moves']} moves, Won: {game_data['win']}")
+                firebase_log.debug("Recent game: %s moves, Won: %s", game_data['moves'], game_data['win'])
             
             return recent_games
         except Exception as e:
-            print(f"Error fetching recent games: {e}")
+            firebase_log.error("Error fetching recent games: %s", e)
             return []
 
     def setup_text_to_speech(self):
@@ -697,47 +970,58 @@ class LakeCrossingGame:
             self.audio_config = texttospeech.AudioConfig(
                 audio_encoding=texttospeech.AudioEncoding.MP3
             )
-            print("Text-to-Speech setup successful")
+            tts_log.info("Text-to-Speech setup completed")
         except Exception as e:
-            print(f"Error setting up Text-to-Speech: {e}")
+            tts_log.error("Error setting up Text-to-Speech: %s", e)
             self.tts_client = None
 
-    def speak_text(self, text):
-        """Convert text to speech and play it"""
+    def synthesize_speech(self, text):
+        """MP3 audio for text, or None if speech is off or synthesis failed. Safe to call off the main thread"""
         if self.tts_client is None or not self.narration_enabled:
-            print("Speech skipped - TTS client is None or narration disabled")  # Debug print
-            return
+            tts_log.debug("Speech skipped - TTS client is None or narration disabled")
+            return None
             
         try:
-            print(f"Attempting to speak text: {text}")  # Debug print
-            
-            # Stop any currently playing audio
-            if self.audio_playing:
-                pygame.mixer.music.stop()
+            tts_log.debug("Speaking: %s", text)
             
             # Create synthesis input
             synthesis_input = texttospeech.SynthesisInput(text=text)
             
             # Perform text-to-speech request
-            print("Requesting speech synthesis...")  # Debug print
+            tts_log.debug("Requesting speech synthesis")
             response = self.tts_client.synthesize_speech(
                 input=synthesis_input,
                 voice=self.voice,
                 audio_config=self.audio_config
             )
-            print("Speech synthesis completed")  # Debug print
+            tts_log.debug("Speech synthesis completed")
+            return response.audio_content
+            
+        except Exception as e:
+            tts_log.error("Error in text-to-speech: %s (%s)", e, type(e).__name__)
+            return None
+
+    def play_speech(self, audio):
+        """Play MP3 audio from synthesize_speech, replacing whatever is playing"""
+        if audio is None:
+            return
+            
+        try:
+            # Stop any currently playing audio
+            if self.audio_playing:
+                pygame.mixer.music.stop()
             
             # Create a temporary file to store the audio
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_audio:
-                temp_audio.write(response.audio_content)
+                temp_audio.write(audio)
                 temp_audio_path = temp_audio.name
-                print(f"Audio saved to temporary file: {temp_audio_path}")  # Debug print
+                tts_log.debug("Audio saved to temporary file: %s", temp_audio_path)
             
             # Play the audio
-            print("Attempting to play audio...")  # Debug print
+            tts_log.debug("Playing audio")
             pygame.mixer.music.load(temp_audio_path)
             pygame.mixer.music.play()
-            print("Audio playback started")  # Debug print
+            tts_log.debug("Audio playback started")
             self.audio_playing = True
             
             # Delete the temporary file after a delay
@@ -745,10 +1029,9 @@ class LakeCrossingGame:
                 pygame.time.wait(5000)  # Wait 5 seconds
                 try:
                     os.remove(temp_audio_path)
-                    print("Temporary audio file cleaned up")  # Debug print
-                except:
-                    print("Failed to clean up temporary audio file")  # Debug print
-                    pass
+                    tts_log.debug("Temporary audio file cleaned up")
+                except OSError as e:
+                    tts_log.warning("Failed to clean up temporary audio file: %s", e)
                 self.audio_playing = False
             
             # Start cleanup in a new thread
@@ -756,49 +1039,79 @@ class LakeCrossingGame:
             threading.Thread(target=cleanup_audio).start()
             
         except Exception as e:
-            print(f"Detailed error in text-to-speech: {str(e)}")  # More detailed error message
-            print(f"Error type: {type(e)}")  # Print error type
+            tts_log.error("Error playing speech: %s (%s)", e, type(e).__name__)
 
     def get_game_analytics(self):
-        """Fetch and display game analytics"""
+        """Fetch analytics and Gemini's analysis on the worker pool; poll_analytics displays them"""
+        if self.offline:
+            self.last_analytics = dict(NO_ANALYTICS)
+            self.last_analysis = "Analytics need Firebase and Gemini, which are off in offline mode."
+            self.display_analytics(self.last_analytics)
+            return
+        if self.analytics_request is None:
+            future = self.gemini_pool.submit(self.request_analytics)
+            future.add_done_callback(lambda future: self.wake())
+            self.analytics_request = (future, time.monotonic() + ANALYTICS_TIMEOUT)
+            # Wake an idle loop just after the deadline to give up on it
+            pygame.time.set_timer(WAKE_EVENT, int(ANALYTICS_TIMEOUT * 1000) + 50, 1)
+        # Show the last numbers, or zeros, until the new ones arrive
+        self.last_analysis = LOADING_ANALYSIS
+        self.display_analytics(getattr(self, 'last_analytics', NO_ANALYTICS))
+
+    def request_analytics(self):
+        """(analytics, analysis) from the cloud function and Gemini.
+
+        Runs on the worker pool, so it must not touch pygame or game state.
+        """
         try:
-            print("Attempting to fetch analytics...")
+            firebase_log.debug("Fetching analytics")
             response = requests.get(
-                'https://us-central1-YOUR_PROJECT_ID.cloudfunctions.net/analyze_gameplay'
+                'https://us-central1-YOUR_PROJECT_ID.cloudfunctions.net/analyze_gameplay',
+                timeout=LIVE_TIMEOUT
             )
-            print(f"Response status: {response.status_code}")
+            firebase_log.debug("Analytics response status: %s", response.status_code)
             
             if response.status_code == 200:
-                self.last_analytics = response.json()  # Store the analytics data
-                # Get Gemini analysis once and store it
-                self.last_analysis = self.analyze_mistakes_with_gemini(self.last_analytics)
-                print(f"Received analytics: {self.last_analytics}")
-                self.display_analytics(self.last_analytics)
-            else:
-                print(f"Error response: {response.text}")
-                # Set default analytics if request fails
-                self.last_analytics = {
-                    'success_rate': 0,
-                    'average_moves': 0,
-                    'optimal_solutions': 0,
-                    'total_games': 0
-                }
-                self.last_analysis = "No game data available yet."
-                self.display_analytics(self.last_analytics)
+                analytics = response.json()
+                firebase_log.debug("Received analytics: %s", analytics)
+                return analytics, self.analyze_mistakes_with_gemini(analytics)
+            firebase_log.warning("Analytics error response: %s", response.text)
+            return dict(NO_ANALYTICS), "No game data available yet."
         except Exception as e:
-            print(f"Error fetching analytics: {e}")
-            # Set default analytics if request fails
-            self.last_analytics = {
-                'success_rate': 0,
-                'average_moves': 0,
-                'optimal_solutions': 0,
-                'total_games': 0
-            }
-            self.last_analysis = "Error fetching game analysis."
-            self.display_analytics(self.last_analytics)
+            firebase_log.error("Error fetching analytics: %s", e)
+            return dict(NO_ANALYTICS), "Error fetching game analysis."
+
+    def poll_analytics(self):
+        """Display the analytics once they arrive, or the fallback analysis once they have taken too long"""
+        if self.analytics_request is None:
+            return
+        future, deadline = self.analytics_request
+        if future.done():
+            try:
+                self.last_analytics, self.last_analysis = future.result()
+            except Exception as e:
+                firebase_log.error("Error fetching analytics: %s", e)
+                self.last_analytics, self.last_analysis = dict(NO_ANALYTICS), "Error fetching game analysis."
+        elif time.monotonic() >= deadline:
+            firebase_log.warning("No analytics after %s seconds, showing the fallback analysis", ANALYTICS_TIMEOUT)
+            future.cancel()  # Only stops it if it hasn't started yet
+            self.last_analytics = getattr(self, 'last_analytics', dict(NO_ANALYTICS))
+            self.last_analysis = ANALYSIS_FALLBACK
+        else:
+            return
+        
+        self.analytics_request = None
+        self.display_analytics(self.last_analytics)
 
     def analyze_mistakes_with_gemini(self, analytics_data):
-        """Use Gemini to analyze gameplay statistics and provide insights"""
+        """Use Gemini to analyze gameplay statistics and provide insights.
+
+        Called from request_analytics on the worker pool.
+        """
+        key = response_cache.data_key(self.puzzle, analytics_data)
+        analysis = self.responses.get("analysis", key)
+        if analysis is not None:
+            return analysis
         try:
             prompt = f"""
             Analyze these Lake Crossing Game statistics:
@@ -806,11 +1119,12 @@ class LakeCrossingGame:
             
             Context:
             - Players move priests and carnivores across a lake
-            - Rules: Carnivores can't outnumber priests, boat carries max 2
-            - Perfect solution takes 11 moves
+            - Rules: Carnivores can't outnumber priests, boat carries max {self.puzzle.capacity}
+            - Perfect solution takes {self.optimal_moves} moves, and {self.optimal_solution_count} different move sequences achieve it
             - Common mistakes: 
               * 'carnivores_outnumber_priests': Players let carnivores eat priests
               * 'invalid_boat_load': Players overload the boat
+              * 'wasted_move': Players cross in a direction that moves them further from the goal
             
             Provide a brief analysis (max 3 lines) that:
             1. Comments on the success rate and common mistakes
@@ -820,25 +1134,26 @@ class LakeCrossingGame:
             Keep the tone encouraging and helpful.
             """
             
-            response = self.retry_config(self.model.generate_content)(prompt)
-            analysis = response.text.strip()
-            print(f"Gemini analysis: {analysis}")
+            texts = self.generate_variants(self.live_retry, prompt, LIVE_TIMEOUT)
+            if not texts:
+                raise ValueError("Gemini returned no analysis")
+            self.responses.put("analysis", key, texts)
+            analysis = texts[0]
+            gemini_log.debug("Gemini analysis: %s", analysis)
             return analysis
         except Exception as e:
-            print(f"Error getting analysis: {e}")
-            return "Focus on maintaining balance between shores and following boat capacity rules."
+            gemini_log.warning("Error getting analysis: %s", e)
+            return ANALYSIS_FALLBACK
 
     def display_analytics(self, analytics):
         """Display analytics on screen"""
         try:
-            print("Rendering analytics surface...")  # Changed message
+            render_log.debug("Rendering analytics surface")
             self.analytics_surface = pygame.Surface((400, 500), pygame.SRCALPHA)
             self.analytics_surface.fill((0, 0, 0, 180))
             
-            stats_font = pygame.font.Font(None, 22)
-            
             # Use stored analysis instead of generating new one
-            analysis = getattr(self, 'last_analysis', 'Loading analysis...')
+            analysis = getattr(self, 'last_analysis', LOADING_ANALYSIS)
             
             y_offset = 10
             stats = [
@@ -853,6 +1168,17 @@ class LakeCrossingGame:
                 f"Avg Moves (Wins): {analytics.get('average_moves', 0):.1f}",
                 f"Perfect Games: {analytics.get('optimal_solutions', 0)}",
                 f"Avg Duration: {analytics.get('average_time', 0):.1f}s",
+                "",
+                "Your Game:",
+            ]
+            
+            distance = self.distance_oracle.distance_to_goal(self.state)
+            if distance is None:
+                stats.append("Crossings To Win: none - no way back")
+            else:
+                stats.append(f"Crossings To Win: {distance}")
+                stats.append(f"Moves Wasted: {self.moves_wasted()}")
+            stats += [
                 "",
                 "Game Analysis:",
             ]
@@ -876,28 +1202,76 @@ class LakeCrossingGame:
                 else:
                     color = (255, 255, 255)  # White for regular stats
                 
-                text = stats_font.render(stat, True, color)
+                text = self.text_cache.render(self.stats_font, stat, color)
                 self.analytics_surface.blit(text, (10, y_offset))
                 y_offset += 22
             
         except Exception as e:
-            print(f"Error displaying analytics: {e}")
-            print(f"Error details: {str(e)}")
+            render_log.exception("Error displaying analytics: %s", e)
+
+    def is_animating(self):
+        """Whether the next frame needs to be drawn without waiting for input"""
+        # Pending Gemini requests aren't here: their futures wake() the loop when they finish
+        return (self.moving_boat or self.hint_timer > 0 or self.narration_timer > 0 or
+                self.renderer.has_changes())
+
+    def toggle_debug_logging(self):
+        """Switch every subsystem to DEBUG, or back to the configured levels"""
+        self.debug_logging = not getattr(self, 'debug_logging', False)
+        if self.debug_logging:
+            logs.set_level(logging.DEBUG)
+        else:
+            logs.configure()
+
+    def wake(self):
+        """Make an idle main loop run a frame; safe to call from other threads"""
+        try:
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+        except pygame.error:
+            pass  # The game has quit while a worker was finishing
 
     def run(self):
         clock = pygame.time.Clock()
+        last_frame = time.perf_counter()
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.handle_click(event.pos)
+            if self.is_animating():
+                pending = pygame.event.get()
+            else:
+                # Nothing on screen can change until an event arrives, so sleep until one does
+                event = pygame.event.wait(IDLE_WAIT_MS)
+                pending = [event] + pygame.event.get() if event.type != pygame.NOEVENT else []
+                # Nothing was moving while we slept, so the wait isn't game time to catch up on
+                last_frame = time.perf_counter()
+            
+            self.profiler.begin_frame()
+            with self.profiler.phase("events"):
+                for event in pending:
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        sys.exit()
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        self.handle_click(event.pos)
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        self.profiler.toggle()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                        self.toggle_debug_logging()
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                        engine_log.warning("Wrote recent log records to %s", logs.dump_recent())
+                    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                        self.renderer.invalidate()
             
-            self.update_boat_position()
-            self.draw()
-            clock.tick(60)
+            now = time.perf_counter()
+            elapsed = min(now - last_frame, MAX_FRAME_TIME)
+            last_frame = now
+            with self.profiler.phase("update"):
+                alpha = self.advance(elapsed)
+            with self.profiler.phase("draw"):
+                self.draw(alpha)
+            self.profiler.end_frame()
+            if self.is_animating():
+                clock.tick(FPS)
 
 if __name__ == "__main__":
+    logs.configure()
     game = LakeCrossingGame()
     game.run()
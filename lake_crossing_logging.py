@@ -0,0 +1,253 @@
+"""Per-subsystem loggers for the Lake Crossing Game.
+
+Every subsystem logs through its own standard-library logger under
+"lake_crossing": engine, render, firebase, gemini and tts. Messages take
+%-style arguments, so a disabled level costs one level check and the
+message is never formatted. Values that are costly to compute in the
+first place go behind logger.isEnabledFor().
+
+Levels default to WARNING and can be set with the LAKE_CROSSING_LOG
+environment variable, e.g. "INFO" or "WARNING,engine=DEBUG,tts=DEBUG",
+or changed while the game runs with set_level().
+
+Records that pass their level are handed to an AsyncSink. The sink's
+writer thread batches them to stderr and to a size-rotated JSON-lines
+file next to the solution cache (LAKE_CROSSING_LOG_FILE picks another
+path, or turns the file off when set empty), so the thread that logged
+never waits on console or disk I/O. The sink also keeps the last records in
+memory; dump_recent() writes them out, and configure() installs an
+excepthook that does so when the game crashes.
+"""
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+import lake_crossing_files as files
+
+ROOT = "lake_crossing"
+SUBSYSTEMS = ("engine", "render", "firebase", "gemini", "tts")
+DEFAULT_LEVEL = logging.WARNING
+FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+CRASH_DUMP = "lake_crossing_crash.jsonl"
+LOG_NAME = "lake_crossing.log.jsonl"
+
+_sink = None
+
+
+def default_log_path():
+    return os.path.join(files.default_cache_dir(), LOG_NAME)
+
+
+def record_to_json(record):
+    entry = {
+        "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "thread": record.threadName,
+        "message": record.getMessage(),
+    }
+    if record.exc_text:
+        entry["exc"] = record.exc_text
+    return json.dumps(entry)
+
+
+class AsyncSink(logging.Handler):
+    """Hands records to a writer thread that batches them to a stream and a JSON-lines file.
+
+    emit() only formats the message (as logging.handlers.QueueHandler does,
+    so later changes to the arguments don't leak into the log) and puts the
+    record on a queue. The writer thread wakes on the first record, collects
+    more for up to flush_interval seconds or batch_size records, and writes
+    the batch with one call per output. The file is rotated to path.1 ...
+    path.<backups> when the next batch would take it past max_bytes.
+
+    The last capacity records are also kept in a deque for dump(). Appending
+    to a bounded deque is atomic, so the ring takes no lock; handle() skips
+    the handler lock too, since nothing else in emit() needs it.
+    """
+
+    def __init__(self, stream=None, path=None, max_bytes=1 << 20, backups=3, capacity=2000,
+                 batch_size=256, flush_interval=0.2):
+        logging.Handler.__init__(self)
+        self.stream = stream
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.recent = deque(maxlen=capacity)
+        self.queue = queue.SimpleQueue()
+        self._file = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def handle(self, record):
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record):
+        try:
+            record = copy.copy(record)  # Other handlers still get the original
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None  # The traceback keeps every frame alive
+            self.recent.append(record)
+            self.queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+    def dump(self, path):
+        """Write the kept records to path as JSON lines; returns how many"""
+        records = list(self.recent)
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(record_to_json(record) + "\n" for record in records)
+        return len(records)
+
+    def close(self):
+        """Write what is queued, then stop the writer thread"""
+        if not self._closed:
+            self._closed = True
+            self.queue.put(None)
+            self._writer.join(5)
+        logging.Handler.close(self)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            if record is None:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            self._write(batch)
+        if self._file is not None:
+            self._file.close()
+
+    def _write(self, batch):
+        try:
+            if self.stream is not None:
+                self.stream.write("".join(self.format(record) + "\n" for record in batch))
+                self.stream.flush()
+            if self.path is not None:
+                data = "".join(record_to_json(record) + "\n" for record in batch).encode("utf-8")
+                if self._file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    self._file = open(self.path, "ab")
+                if self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+        except Exception:
+            self.handleError(batch[-1])
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backups:
+            for index in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "wb")  # Truncates when there are no backups
+
+
+def get_logger(subsystem):
+    if subsystem not in SUBSYSTEMS:
+        raise ValueError(f"Unknown subsystem {subsystem!r}, expected one of {SUBSYSTEMS}")
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+def set_level(level, subsystem=None):
+    """Set one subsystem's level, or every subsystem's when subsystem is None.
+
+    level is a logging constant or its name ("DEBUG", "info", ...).
+    """
+    if isinstance(level, str):
+        level = level.upper()
+    if subsystem is None:
+        logging.getLogger(ROOT).setLevel(level)
+        for name in SUBSYSTEMS:
+            get_logger(name).setLevel(logging.NOTSET)  # Follow the root level again
+    else:
+        get_logger(subsystem).setLevel(level)
+
+
+def dump_recent(path=None):
+    """Write the sink's recent records to path (a timestamped file by default).
+
+    Returns the path, or None if configure() hasn't set up a sink.
+    """
+    if _sink is None:
+        return None
+    path = path or f"lake_crossing_recent_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    _sink.dump(path)
+    return path
+
+
+def _crash_hook(previous):
+    def hook(exc_type, exc, tb):
+        if issubclass(exc_type, KeyboardInterrupt):
+            previous(exc_type, exc, tb)
+            return
+        # Logged with its traceback, so the default hook would only print it twice
+        logging.getLogger(ROOT).critical("Uncaught exception", exc_info=(exc_type, exc, tb))
+        try:
+            dump_recent(CRASH_DUMP)
+        except OSError:
+            previous(exc_type, exc, tb)
+    return hook
+
+
+def configure(spec=None, stream=None, path=None):
+    """Attach the AsyncSink to the game's loggers and apply a level spec.
+
+    spec defaults to $LAKE_CROSSING_LOG. path (the JSON-lines file) defaults
+    to $LAKE_CROSSING_LOG_FILE, then default_log_path(); "" writes no file.
+    Calling it again only re-applies levels.
+    """
+    global _sink
+    root = logging.getLogger(ROOT)
+    if _sink is None:
+        if path is None:
+            path = os.environ.get("LAKE_CROSSING_LOG_FILE", default_log_path())
+        _sink = AsyncSink(stream or sys.stderr, path or None)
+        _sink.setFormatter(logging.Formatter(FORMAT))
+        root.addHandler(_sink)
+        root.propagate = False  # Don't print twice if the host app configured logging too
+        sys.excepthook = _crash_hook(sys.excepthook)
+        atexit.register(_sink.close)
+
+    set_level(DEFAULT_LEVEL)
+    spec = os.environ.get("LAKE_CROSSING_LOG", "") if spec is None else spec
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        subsystem, _, level = part.rpartition("=")
+        try:
+            set_level(level, subsystem or None)
+        except ValueError as e:
+            root.warning("Ignoring log setting %r: %s", part, e)
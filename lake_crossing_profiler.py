@@ -0,0 +1,146 @@
+"""Rolling per-frame phase timings, shown as an in-game overlay.
+
+The main loop brackets each frame with begin_frame()/end_frame() and each
+piece of work with `with profiler.phase(name):`. Phases are timed
+independently, so a nested phase (network inside events, sprites inside
+draw) is also counted in its parent. While the profiler is disabled,
+phase() hands back a shared no-op context and nothing is timed.
+"""
+import time
+from collections import deque
+
+import pygame
+
+FRAME_BUDGET = 1 / 60
+# Upper edges of the frame-time histogram bins in milliseconds; the last bin is everything slower
+HISTOGRAM_EDGES_MS = (4, 8, 12, 16.7, 25, 33.3, 50)
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.current.setdefault(self.name, 0.0)  # Parents are listed before their sub-phases
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        times = self.profiler.current
+        times[self.name] = times.get(self.name, 0.0) + time.perf_counter() - self.started
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, window=120, budget=FRAME_BUDGET):
+        self.window = window
+        self.budget = budget
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.frames = deque(maxlen=self.window)  # (frame seconds, {phase: seconds})
+        self.frame_count = 0
+        self.over_budget = 0
+        self.current = {}
+        self._frame_started = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.reset()
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def begin_frame(self):
+        if self.enabled:
+            self.current = {}
+            self._frame_started = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self._frame_started is None:
+            return
+        total = time.perf_counter() - self._frame_started
+        self.frames.append((total, self.current))
+        self.frame_count += 1
+        if total > self.budget:
+            self.over_budget += 1
+        self._frame_started = None
+
+    def phase_averages(self):
+        """{phase: mean seconds per frame over the window}, in the order phases first ran"""
+        totals = {}
+        for _, phases in self.frames:
+            for name, seconds in phases.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        count = len(self.frames) or 1
+        return {name: seconds / count for name, seconds in totals.items()}
+
+    def histogram(self):
+        """Frames in the window per HISTOGRAM_EDGES_MS bin, plus one for slower frames"""
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for total, _ in self.frames:
+            milliseconds = total * 1000
+            for index, edge in enumerate(HISTOGRAM_EDGES_MS):
+                if milliseconds <= edge:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def render_overlay(self, font, width=280):
+        """Translucent panel with phase averages, the histogram and the over-budget count"""
+        totals = [total for total, _ in self.frames]
+        rows = []  # (indent, label, value)
+        if totals:
+            rows.append((0, "frame avg / max",
+                         f"{sum(totals) / len(totals) * 1000:.2f} / {max(totals) * 1000:.2f} ms"))
+        for name, seconds in self.phase_averages().items():
+            # Sub-phases are named parent.child; indent them under the parent
+            rows.append((20 if "." in name else 0, name.split(".")[-1], f"{seconds * 1000:.2f} ms"))
+        window_over = sum(1 for total in totals if total > self.budget)
+        rows.append((0, f"over {self.budget * 1000:.1f} ms", f"{window_over}/{len(totals)} (all {self.over_budget})"))
+
+        line_height = font.get_linesize()
+        bar_height = 40
+        counts = self.histogram()
+        height = 10 + line_height * len(rows) + 10 + bar_height + line_height + 10
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 200))
+        y = 10
+        for indent, label, value in rows:
+            panel.blit(font.render(label, True, (255, 255, 255)), (10 + indent, y))
+            value_text = font.render(value, True, (255, 255, 255))
+            panel.blit(value_text, value_text.get_rect(topright=(width - 10, y)))
+            y += line_height
+
+        y += 10
+        bar_width = (width - 20) // len(counts)
+        tallest = max(counts) or 1
+        for index, count in enumerate(counts):
+            over = index > 0 and HISTOGRAM_EDGES_MS[index - 1] >= self.budget * 1000
+            bar = int(bar_height * count / tallest)
+            color = (255, 80, 80) if over else (80, 255, 120)
+            pygame.draw.rect(panel, color, (10 + index * bar_width, y + bar_height - bar, bar_width - 2, bar))
+        y += bar_height
+        labels = [str(round(edge)) for edge in HISTOGRAM_EDGES_MS] + [f">{HISTOGRAM_EDGES_MS[-1]}"]
+        for index, label in enumerate(labels):
+            panel.blit(font.render(label, True, (200, 200, 200)), (10 + index * bar_width, y))
+        return panel
@@ -0,0 +1,151 @@
+"""Rendering helpers for the Lake Crossing Game."""
+from collections import OrderedDict
+
+import pygame
+
+import lake_crossing_profiler as profiling
+
+
+class SceneSprite(pygame.sprite.DirtySprite):
+    """A DirtySprite that only marks itself dirty when it actually changes.
+
+    Setting the same position, image or visibility again is free, so the
+    game can re-sync sprites with its state every frame and only the ones
+    that moved or changed get redrawn.
+    """
+
+    def __init__(self, image, topleft=(0, 0), layer=0, visible=True, clickable=False):
+        pygame.sprite.DirtySprite.__init__(self)
+        self._layer = layer
+        self.image = image
+        self.rect = image.get_rect(topleft=topleft)
+        self.visible = visible
+        self.clickable = clickable
+        self.dirty = 1
+
+    def move_to(self, topleft):
+        topleft = (int(topleft[0]), int(topleft[1]))
+        if self.rect.topleft != topleft:
+            self.rect.topleft = topleft
+            self.dirty = 1
+
+    def set_image(self, image):
+        if image is not self.image:
+            self.image = image
+            self.rect.size = image.get_size()
+            self.dirty = 1
+
+    def show(self, visible=True):
+        if self.visible != visible:
+            self.visible = visible  # DirtySprite marks itself dirty
+
+
+class SceneRenderer:
+    """Draws a pygame.sprite.LayeredDirty scene over a background image.
+
+    Each frame only the areas of sprites that changed since the last frame
+    (and anything invalidated) are cleared to the background, the sprites
+    overlapping them are redrawn in layer order, and just those rects are
+    pushed with display.update. Frames where nothing changed do nothing.
+    """
+
+    def __init__(self, screen, background, profiler=None):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.profiler = profiler or profiling.FrameProfiler()  # Disabled unless one is passed in
+        self.scene = pygame.sprite.LayeredDirty()
+        self.scene.clear(screen, background)
+        self._repaint = True  # First frame paints everything
+
+    def add(self, *sprites):
+        self.scene.add(*sprites)
+
+    def set_layer(self, sprite, layer):
+        if self.scene.get_layer_of_sprite(sprite) != layer:
+            self.scene.change_layer(sprite, layer)
+
+    def invalidate(self, rect=None):
+        """Repaint rect (or the whole screen when None) on the next frame"""
+        rect = self.screen_rect if rect is None else pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            self.scene.repaint_rect(rect)
+            self._repaint = True
+
+    def has_changes(self):
+        return self._repaint or any(sprite.dirty for sprite in self.scene)
+
+    def render(self):
+        """Redraw what changed and update the display. False if nothing changed"""
+        if not self.has_changes():
+            return False
+        self._repaint = False
+        with self.profiler.phase("draw.sprites"):
+            rects = self.scene.draw(self.screen)
+        with self.profiler.phase("draw.display"):
+            pygame.display.update(rects)
+        return True
+
+    def sprite_at(self, pos):
+        """Topmost visible clickable sprite under pos, or None"""
+        for sprite in reversed(self.scene.get_sprites_at(pos)):
+            if sprite.visible and sprite.clickable:
+                return sprite
+        return None
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color, antialias).
+
+    Labels and counters are the same from frame to frame, so rasterizing
+    them once and reusing the surface makes steady-state frames free of
+    font rendering. Surfaces returned from the cache are shared; blit them
+    but do not draw on them.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+class CachedSurface:
+    """A surface built by build(key) and rebuilt only when key changes.
+
+    Overlays whose content changes rarely (a hint, the game-over banner)
+    are built once per content and blitted as-is every frame after that.
+    """
+
+    _EMPTY = object()
+
+    def __init__(self, build):
+        self.build = build
+        self.key = self._EMPTY
+        self.surface = None
+
+    def get(self, key):
+        if key != self.key:
+            self.surface = self.build(key)
+            self.key = key
+        return self.surface
+
+    def invalidate(self):
+        self.key = self._EMPTY
+        self.surface = None
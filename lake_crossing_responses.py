@@ -0,0 +1,175 @@
+"""Persistent cache of Gemini responses, keyed by board position and prompt kind.
+
+Hints and narration depend only on where everyone is, not on how the
+player got there, so responses are stored under a key built from the
+puzzle and the decoded state (state_key) rather than the prompt text.
+Analysis is keyed by a digest of the analytics it describes (data_key).
+A classic game visits the same few positions over and over; once a
+position has been seen, its hint and narration come from here.
+
+Each key keeps up to `variants` responses and get() picks one at random,
+so repeat positions don't always read the same line. Entries expire
+`ttl` seconds after they were written, and past max_entries the least
+recently used ones are dropped.
+
+The cache is a JSON-lines file next to the solution cache: a header line,
+then one line per put() with the entry as it stands after the put. put()
+only appends its line, so it is cheap enough for the main thread. Loading
+replays the lines (later ones win), and once the file holds more than
+about twice as many lines as live entries it is rewritten atomically with
+just the live ones. Callers run on worker threads, so every method takes the
+cache's lock.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import lake_crossing_files as files
+import lake_crossing_logging as logs
+
+log = logs.get_logger("gemini")
+
+VERSION = 1
+CACHE_NAME = "gemini_responses.jsonl"
+KINDS = ("hint", "narration", "analysis")
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL = 30 * 24 * 60 * 60
+DEFAULT_VARIANTS = 3
+COMPACT_SLACK = 16  # Replaced lines tolerated on top of twice the live entries, so small caches don't rewrite often
+
+
+def default_path():
+    return os.path.join(files.default_cache_dir(), CACHE_NAME)
+
+
+def state_key(puzzle, state):
+    """Key for a board position: the puzzle and the decoded state, without the move count"""
+    return "{}/{}/{}:{}".format(*puzzle, ",".join(str(value) for value in state))
+
+
+def data_key(puzzle, data):
+    """Key for a JSON-serializable value such as the analytics a report was written for"""
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return "{}/{}/{}:{}".format(*puzzle, digest)
+
+
+class ResponseCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, variants=DEFAULT_VARIANTS):
+        self.path = path or default_path()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = variants
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # "kind|key" -> {"created", "used", "variants"}, least recently used first
+        self._lines = None  # Entry lines in the file, live or replaced; None until the file has a header
+        self._load()
+
+    def get(self, kind, key):
+        """One of the stored responses for key, or None"""
+        with self._lock:
+            entry = self._entries.get(self._name(kind, key))
+            if entry is None or self._expired(entry, time.time()):
+                self.misses += 1
+                return None
+            entry["used"] = time.time()
+            self._entries.move_to_end(self._name(kind, key))
+            self.hits += 1
+            return random.choice(entry["variants"])
+
+    def put(self, kind, key, texts):
+        """Add responses for key, keeping the newest `variants` of them, and save"""
+        texts = [text for text in texts if text]
+        if not texts:
+            return
+        name = self._name(kind, key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is None or self._expired(entry, now):
+                entry = {"created": now, "variants": []}
+            variants = [text for text in entry["variants"] if text not in texts] + texts
+            entry["variants"] = variants[-self.variants:]
+            entry["used"] = now
+            self._entries[name] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._lines is None or self._lines >= 2 * len(self._entries) + COMPACT_SLACK:
+                self._compact()
+            else:
+                self._append(name, entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _name(self, kind, key):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown response kind {kind!r}, expected one of {KINDS}")
+        return f"{kind}|{key}"
+
+    def _expired(self, entry, now):
+        return now - entry["created"] > self.ttl
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            log.warning("Ignoring unreadable response cache %s: %s", self.path, e)
+            return
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("version") != VERSION:
+            if lines:
+                log.info("Replacing response cache %s from another version", self.path)
+            self._compact()
+            return
+
+        entries = {}
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+                entries[record["name"]] = record["entry"]
+            except (ValueError, KeyError, TypeError):
+                continue  # Line cut short when a previous run stopped mid-write
+        self._lines = len(lines) - 1
+        if not lines[-1].endswith("\n"):
+            self._lines = None  # Appending after a cut-short line would garble the next one too
+        now = time.time()
+        live = [(name, entry) for name, entry in entries.items()
+                if entry.get("variants") and not self._expired(entry, now)]
+        live.sort(key=lambda item: item[1]["used"])
+        self._entries.update(live[-self.max_entries:])
+        if self._lines is None or self._lines > 2 * len(self._entries) + COMPACT_SLACK:
+            self._compact()
+
+    def _append(self, name, entry):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"name": name, "entry": entry}) + "\n")
+            self._lines += 1
+        except OSError as e:
+            log.warning("Could not save response cache %s: %s", self.path, e)
+
+    def _compact(self):
+        """Rewrite the file with just the live entries"""
+        def write(f):
+            f.write((json.dumps({"version": VERSION}) + "\n").encode("utf-8"))
+            for name, entry in self._entries.items():
+                f.write((json.dumps({"name": name, "entry": entry}) + "\n").encode("utf-8"))
+
+        try:
+            files.atomic_write(self.path, write)
+            self._lines = len(self._entries)
+        except OSError as e:
+            log.warning("Could not save response cache %s: %s", self.path, e)
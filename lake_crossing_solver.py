@@ -0,0 +1,333 @@
+"""Solver for the Lake Crossing Game.
+
+Works on crossing positions: (left priests, left carnivores, boat position),
+where anyone sitting in a docked boat counts towards that shore. A BFS from
+the goal over every valid position gives the optimal next crossing for each
+one, so hints are an array lookup rather than a Gemini call. Larger
+puzzles are solved from the start position with A*.
+
+Run directly to time a solve: python lake_crossing_solver.py 1000 1000 10
+"""
+import argparse
+import heapq
+import time
+import tracemalloc
+from array import array
+from collections import deque, namedtuple
+
+import lake_crossing_engine as engine
+
+SolveResult = namedtuple("SolveResult", ["path", "nodes_expanded", "peak_memory", "wall_time"])
+
+
+def position_of(state):
+    """Crossing position for an engine State"""
+    left_priests, left_carnivores = state.left_priests, state.left_carnivores
+    if state.boat_position == engine.LEFT:
+        left_priests += state.boat_priests
+        left_carnivores += state.boat_carnivores
+    return (left_priests, left_carnivores, state.boat_position)
+
+
+def is_valid_position(left_priests, left_carnivores, puzzle=engine.CLASSIC):
+    right_priests = puzzle.priests - left_priests
+    right_carnivores = puzzle.carnivores - left_carnivores
+    if left_priests > 0 and left_carnivores > left_priests:
+        return False
+    if right_priests > 0 and right_carnivores > right_priests:
+        return False
+    return True
+
+
+def boat_loads(puzzle=engine.CLASSIC):
+    """Every (priests, carnivores) load the boat can carry"""
+    return [(priests, carnivores)
+            for priests in range(min(puzzle.capacity, puzzle.priests) + 1)
+            for carnivores in range(min(puzzle.capacity - priests, puzzle.carnivores) + 1)
+            if priests + carnivores > 0]
+
+
+def neighbours(position, puzzle=engine.CLASSIC, loads=None):
+    """(load, next position) for every valid crossing out of position"""
+    left_priests, left_carnivores, side = position
+    result = []
+    for priests, carnivores in loads or boat_loads(puzzle):
+        if side == engine.LEFT:
+            if priests > left_priests or carnivores > left_carnivores:
+                continue
+            next_position = (left_priests - priests, left_carnivores - carnivores, engine.RIGHT)
+        else:
+            if (priests > puzzle.priests - left_priests or
+                    carnivores > puzzle.carnivores - left_carnivores):
+                continue
+            next_position = (left_priests + priests, left_carnivores + carnivores, engine.LEFT)
+        if is_valid_position(next_position[0], next_position[1], puzzle):
+            result.append(((priests, carnivores), next_position))
+    return result
+
+
+def start_position(puzzle=engine.CLASSIC):
+    return (puzzle.priests, puzzle.carnivores, engine.LEFT)
+
+
+def goal_position():
+    return (0, 0, engine.RIGHT)
+
+
+class DistanceOracle:
+    """Exact number of crossings left to win from any position.
+
+    Built once by a reverse BFS from the goal. Every crossing can be undone
+    by sending the same load back, so that BFS reaches exactly the
+    positions that can still win. Distances and the optimal next load live
+    in two flat arrays indexed by position, so every query is an array
+    read. Pass both arrays in (for example from lake_crossing_cache) to
+    skip the search.
+    """
+
+    def __init__(self, puzzle=engine.CLASSIC, distances=None, next_moves=None):
+        self.puzzle = puzzle
+        self.loads = boat_loads(puzzle)
+        self.size = (puzzle.priests + 1) * (puzzle.carnivores + 1) * 2
+        if distances is None or next_moves is None:
+            distances, next_moves = self._search()
+        self.distances = distances
+        self.next_moves = next_moves  # Index into self.loads, -1 when no move wins
+
+    def _search(self):
+        load_index = {load: index for index, load in enumerate(self.loads)}
+        distances = array("i", [-1]) * self.size
+        next_moves = array("h", [-1]) * self.size
+
+        goal = goal_position()
+        distances[self.index(goal)] = 0
+        queue = deque([goal])
+        while queue:
+            position = queue.popleft()
+            distance = distances[self.index(position)] + 1
+            for load, previous in neighbours(position, self.puzzle, self.loads):
+                previous_index = self.index(previous)
+                if distances[previous_index] < 0:
+                    distances[previous_index] = distance
+                    # Carrying the same load back from previous returns to position
+                    next_moves[previous_index] = load_index[load]
+                    queue.append(previous)
+        return distances, next_moves
+
+    def index(self, position):
+        left_priests, left_carnivores, side = position
+        return ((left_priests * (self.puzzle.carnivores + 1) + left_carnivores) << 1) | (side == engine.RIGHT)
+
+    def distance(self, position):
+        """Crossings left to win from position, or None if it can no longer be won"""
+        distance = self.distances[self.index(position)]
+        return distance if distance >= 0 else None
+
+    def distance_to_goal(self, state):
+        """Crossings left to win from an engine State, or None if it can no longer be won"""
+        return self.distance(position_of(state))
+
+    def best_steps(self, position):
+        """(load, next position) for every crossing that brings position one step closer to the goal"""
+        distance = self.distance(position)
+        if not distance:
+            return []
+        return [(load, next_position) for load, next_position in neighbours(position, self.puzzle, self.loads)
+                if self.distances[self.index(next_position)] == distance - 1]
+
+    def count_optimal_solutions(self, position=None):
+        """Number of distinct shortest crossing sequences from position (the start by default).
+
+        Dynamic programming over the shortest-path DAG one distance layer at
+        a time, so solutions are counted without being listed and only one
+        layer of counts is held at once.
+        """
+        position = position or start_position(self.puzzle)
+        target = self.distance(position)
+        if target is None:
+            return 0
+        layer = {goal_position(): 1}
+        for distance in range(1, target + 1):
+            next_layer = {}
+            for current, count in layer.items():
+                # Crossings are reversible, so the DAG's predecessors are neighbours one step further out
+                for _, previous in neighbours(current, self.puzzle, self.loads):
+                    if self.distances[self.index(previous)] == distance:
+                        next_layer[previous] = next_layer.get(previous, 0) + count
+            layer = next_layer
+        return layer.get(position, 0)
+
+    def optimal_solutions(self, position=None):
+        """Yield every shortest sequence of loads from position (the start by default), one at a time.
+
+        Walks the shortest-path DAG depth first, so memory stays proportional
+        to the solution length however many solutions there are.
+        """
+        position = position or start_position(self.puzzle)
+        distance = self.distance(position)
+        if distance is None:
+            return
+        if distance == 0:
+            yield ()
+            return
+        path = []
+        stack = [iter(self.best_steps(position))]
+        while stack:
+            step = next(stack[-1], None)
+            if step is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+            load, next_position = step
+            path.append(load)
+            if self.distances[self.index(next_position)] == 0:
+                yield tuple(path)
+                path.pop()
+            else:
+                stack.append(iter(self.best_steps(next_position)))
+
+
+def next_move_codes(state_table, oracle=None):
+    """Flat array of boat_loads() indexes, one per StateTable code (-1 when no move wins)"""
+    oracle = oracle or DistanceOracle(state_table.puzzle)
+    moves = array("h", [-1]) * state_table.size
+    for code, state in enumerate(state_table.states):
+        if state is not None:
+            moves[code] = oracle.next_moves[oracle.index(position_of(state))]
+    return moves
+
+
+def count_reachable_positions(puzzle=engine.CLASSIC):
+    """Size of the valid state space reachable from the start position"""
+    loads = boat_loads(puzzle)
+    start = start_position(puzzle)
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for _, next_position in neighbours(queue.popleft(), puzzle, loads):
+            if next_position not in seen:
+                seen.add(next_position)
+                queue.append(next_position)
+    return len(seen)
+
+
+def crossings_needed(position, puzzle=engine.CLASSIC):
+    """Lower bound on crossings left, ignoring the carnivore rule.
+
+    Every round trip moves at most capacity - 1 people net to the right
+    and the last crossing moves at most capacity, so the heuristic is
+    admissible and consistent for A*.
+    """
+    left_priests, left_carnivores, side = position
+    waiting = left_priests + left_carnivores
+    if waiting == 0:
+        return 0
+    if side == engine.RIGHT:
+        # Someone has to bring the boat back first
+        return 1 + _crossings_from_left(waiting + 1, puzzle.capacity)
+    return _crossings_from_left(waiting, puzzle.capacity)
+
+
+def _crossings_from_left(waiting, capacity):
+    if waiting <= capacity:
+        return 1
+    if capacity < 2:
+        # No net progress is possible; any finite bound stays admissible
+        return 2 * waiting
+    round_trips = -(-(waiting - capacity) // (capacity - 1))
+    return 2 * round_trips + 1
+
+
+def solve(puzzle=engine.CLASSIC, trace_memory=False):
+    """Shortest sequence of loads from the start to the goal using A*.
+
+    SolveResult.path is None when the puzzle cannot be solved. peak_memory
+    is reported in bytes only when trace_memory is set, because tracemalloc
+    slows the search down noticeably.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    loads = boat_loads(puzzle)
+    start = start_position(puzzle)
+    goal = goal_position()
+    best = {start: 0}
+    parent = {start: None}
+    frontier = [(crossings_needed(start, puzzle), 0, start)]
+    closed = set()
+    nodes_expanded = 0
+    found = False
+
+    while frontier:
+        _, negative_cost, position = heapq.heappop(frontier)
+        if position in closed:
+            continue
+        if position == goal:
+            found = True
+            break
+        closed.add(position)
+        nodes_expanded += 1
+        cost = -negative_cost + 1
+        for load, next_position in neighbours(position, puzzle, loads):
+            if next_position in closed or best.get(next_position, cost + 1) <= cost:
+                continue
+            best[next_position] = cost
+            parent[next_position] = (position, load)
+            # Ties on f go to the deeper node, which keeps the frontier narrow
+            heapq.heappush(frontier, (cost + crossings_needed(next_position, puzzle), -cost, next_position))
+
+    path = None
+    if found:
+        path = []
+        position = goal
+        while parent[position] is not None:
+            position, load = parent[position]
+            path.append(load)
+        path.reverse()
+
+    wall_time = time.perf_counter() - started
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return SolveResult(path, nodes_expanded, peak_memory, wall_time)
+
+
+def describe_move(load, boat_position):
+    """Plain-text instruction for carrying load from boat_position"""
+    priests, carnivores = load
+    parts = []
+    if priests:
+        parts.append(f"{priests} priest" + ("s" if priests > 1 else ""))
+    if carnivores:
+        parts.append(f"{carnivores} carnivore" + ("s" if carnivores > 1 else ""))
+    who = " and ".join(parts)
+    if boat_position == engine.LEFT:
+        return f"Take {who} across to the right shore."
+    return f"Bring {who} back to the left shore."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a Lake Crossing puzzle with A*")
+    parser.add_argument("priests", type=int)
+    parser.add_argument("carnivores", type=int)
+    parser.add_argument("capacity", type=int)
+    parser.add_argument("--memory", action="store_true", help="Trace peak memory (slower)")
+    args = parser.parse_args()
+
+    puzzle = engine.Puzzle(args.priests, args.carnivores, args.capacity)
+    result = solve(puzzle, trace_memory=args.memory)
+    if result.path is None:
+        print(f"{puzzle} has no solution")
+    else:
+        print(f"{puzzle} solved in {len(result.path)} crossings")
+    print(f"Nodes expanded: {result.nodes_expanded}")
+    if result.peak_memory is not None:
+        print(f"Peak memory: {result.peak_memory / 1024:.1f} KiB")
+    print(f"Wall time: {result.wall_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
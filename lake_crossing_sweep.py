@@ -0,0 +1,174 @@
+"""Solve a grid of puzzle configurations on every CPU core.
+
+For each (priests, carnivores, capacity) it records whether the puzzle can
+be solved, the optimal number of crossings, how many positions are
+reachable from the start and how long the A* solve took. Results are
+written as they finish, to CSV or JSON lines depending on the output file
+extension. Rerunning with the same output file skips configurations that
+are already there, so an interrupted sweep can be resumed.
+
+Example:
+    python lake_crossing_sweep.py --priests 1-20 --carnivores 1-20 --capacity 2-6 --output sweep.csv
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import lake_crossing_engine as engine
+import lake_crossing_solver as solver
+
+FIELDS = ["priests", "carnivores", "capacity", "solvable", "optimal_length",
+          "state_space", "nodes_expanded", "solve_time"]
+
+
+def parse_range(text):
+    """'3', '1-10' or '2,4,8-10' -> sorted list of ints"""
+    values = set()
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            low, high = part.split("-", 1)
+            values.update(range(int(low), int(high) + 1))
+        elif part:
+            values.add(int(part))
+    return sorted(values)
+
+
+def solve_config(config):
+    """Sweep result row for one (priests, carnivores, capacity)"""
+    puzzle = engine.Puzzle(*config)
+    started = time.perf_counter()
+    result = solver.solve(puzzle)
+    solve_time = time.perf_counter() - started
+    return {
+        "priests": puzzle.priests,
+        "carnivores": puzzle.carnivores,
+        "capacity": puzzle.capacity,
+        "solvable": result.path is not None,
+        "optimal_length": len(result.path) if result.path is not None else None,
+        "state_space": solver.count_reachable_positions(puzzle),
+        "nodes_expanded": result.nodes_expanded,
+        "solve_time": round(solve_time, 6),
+    }
+
+
+def is_jsonl(path):
+    return path.endswith((".jsonl", ".json"))
+
+
+def _row_config(row):
+    """(priests, carnivores, capacity) if every field in FIELDS is present and parses, else None"""
+    try:
+        config = (int(row["priests"]), int(row["carnivores"]), int(row["capacity"]))
+        solvable = str(row["solvable"])
+        if solvable not in ("True", "False"):
+            return None
+        if row["optimal_length"] in (None, ""):
+            if solvable == "True":
+                return None
+        else:
+            int(row["optimal_length"])
+        int(row["state_space"])
+        int(row["nodes_expanded"])
+        float(row["solve_time"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return config
+
+
+def completed_configs(path):
+    """Configurations already present in a previous run's output"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, newline="") as f:
+        lines = f.readlines()
+    if lines and not lines[-1].endswith("\n"):
+        lines.pop()  # Row cut short when the last run was interrupted
+    if is_jsonl(path):
+        rows = []
+        for line in lines:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue  # Line cut short when an earlier run was interrupted
+    else:
+        rows = csv.DictReader(lines)
+    for row in rows:
+        config = _row_config(row) if isinstance(row, dict) else None
+        if config is not None:
+            done.add(config)
+    return done
+
+
+class ResultWriter:
+    """Appends one row per finished configuration and flushes it straight away"""
+
+    def __init__(self, path):
+        self.jsonl = is_jsonl(path)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            _ensure_trailing_newline(path)
+        self.file = open(path, "a", newline="")
+        if not self.jsonl:
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if new_file:
+                self.writer.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.file.write(json.dumps(row) + "\n")
+        else:
+            self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def _ensure_trailing_newline(path):
+    # An interrupted run can leave half a line; start the next row on a fresh one
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a grid of Lake Crossing puzzle configurations")
+    parser.add_argument("--priests", default="1-10", help="e.g. 3, 1-10 or 2,4,8-10")
+    parser.add_argument("--carnivores", default="1-10")
+    parser.add_argument("--capacity", default="2-4")
+    parser.add_argument("--output", default="sweep.csv", help=".csv or .jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    configs = [(priests, carnivores, capacity)
+               for priests in parse_range(args.priests)
+               for carnivores in parse_range(args.carnivores)
+               for capacity in parse_range(args.capacity)]
+    done = completed_configs(args.output)
+    pending = [config for config in configs if config not in done]
+    print(f"{len(configs)} configurations, {len(configs) - len(pending)} already in {args.output}")
+    if not pending:
+        return
+
+    writer = ResultWriter(args.output)
+    started = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            chunksize = max(1, len(pending) // (args.workers * 8))
+            for count, row in enumerate(pool.imap_unordered(solve_config, pending, chunksize), 1):
+                writer.write(row)
+                if count % 100 == 0 or count == len(pending):
+                    print(f"{count}/{len(pending)} done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import lake_crossing_batch as batch
+import lake_crossing_engine as engine
+import lake_crossing_solver as solver
+
+PUZZLES = [engine.CLASSIC, engine.Puzzle(5, 4, 3), engine.Puzzle(7, 7, 4)]
+
+
+def table_codes(table):
+    return np.array([code for code, state in enumerate(table.states) if state is not None])
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_masks_match_scalar_rules(puzzle):
+    table = engine.StateTable(puzzle)
+    codes = table_codes(table)
+    fields = batch.decode(codes, table)
+    valid = batch.valid_mask(codes, table)
+    win = batch.win_mask(codes, table)
+    for i, code in enumerate(codes):
+        state = table.states[code]
+        assert tuple(int(field[i]) for field in fields) == (*state[:4], int(state.boat_position == engine.RIGHT))
+        assert valid[i] == engine.is_valid(state, puzzle)
+        assert win[i] == engine.is_win(state)
+
+
+def scalar_replay(moves, puzzle):
+    state = engine.initial_state(puzzle)
+    taken = 0
+    for index in moves:
+        if engine.is_win(state) or not engine.is_valid(state, puzzle):
+            break
+        state = engine.apply_move(state, engine.MOVES[index], puzzle)
+        taken += 1
+    return state, taken
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_replay_matches_scalar_games(puzzle):
+    table = engine.StateTable(puzzle)
+    rng = random.Random(str(puzzle))
+    moves = np.array([[rng.randrange(len(engine.MOVES)) for _ in range(60)] for _ in range(300)])
+    codes, won, lost, taken = batch.replay(moves, table)
+    for game in range(len(moves)):
+        state, steps = scalar_replay(moves[game], puzzle)
+        assert table.states[codes[game]] == state
+        assert won[game] == engine.is_win(state)
+        assert lost[game] == (not engine.is_valid(state, puzzle))
+        assert taken[game] == steps
+
+
+def test_replay_plays_the_solver_path():
+    # Board the load, cross, land everyone, for each crossing the solver picks
+    script = []
+    for priests, carnivores in solver.solve(engine.CLASSIC).path:
+        boarding = [engine.BOARD_PRIEST] * priests + [engine.BOARD_CARNIVORE] * carnivores
+        landing = [engine.LAND_PRIEST] * priests + [engine.LAND_CARNIVORE] * carnivores
+        script += boarding + [engine.CROSS_BOAT] + landing
+    table = engine.StateTable(engine.CLASSIC)
+    codes, won, lost, taken = batch.replay([[engine.MOVE_INDEX[move] for move in script]], table)
+    assert won[0] and not lost[0]
+    assert taken[0] == len(script)
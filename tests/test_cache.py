@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import lake_crossing_cache as cache
+import lake_crossing_engine as engine
+import lake_crossing_solver as solver
+
+
+def test_cached_solution_round_trips(tmp_path):
+    puzzle = engine.Puzzle(5, 5, 3)
+    oracle = solver.DistanceOracle(puzzle)
+    path = cache.cache_path(puzzle, str(tmp_path))
+    cache.write_solution(puzzle, oracle, path)
+
+    solution = cache.CachedSolution(puzzle, path)
+    try:
+        assert list(solution.distances) == list(oracle.distances)
+        assert list(solution.next_moves) == list(oracle.next_moves)
+        loaded = solution.oracle()
+        start = solver.start_position(puzzle)
+        assert loaded.distance(start) == oracle.distance(start)
+        assert loaded.count_optimal_solutions() == oracle.count_optimal_solutions()
+    finally:
+        solution.close()
+
+
+def test_stale_or_corrupt_files_are_rejected(tmp_path):
+    puzzle = engine.CLASSIC
+    path = cache.cache_path(puzzle, str(tmp_path))
+    cache.write_solution(puzzle, solver.DistanceOracle(puzzle), path)
+
+    with pytest.raises(ValueError):
+        cache.CachedSolution(engine.Puzzle(3, 3, 3), path)
+
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)
+    with pytest.raises(ValueError):
+        cache.CachedSolution(puzzle, path)
+
+    with open(path, "wb") as f:
+        f.write(b"LK")
+    with pytest.raises(ValueError):
+        cache.CachedSolution(puzzle, path)
+
+
+def test_load_or_solve_rewrites_a_corrupt_file(tmp_path):
+    path = cache.cache_path(engine.CLASSIC, str(tmp_path))
+    with open(path, "wb") as f:
+        f.write(b"not a solution")
+    solution = cache.load_or_solve(engine.CLASSIC, str(tmp_path))
+    try:
+        assert solution.oracle().distance(solver.start_position()) == 11
+    finally:
+        solution.close()
+
+
+def test_evict_drops_least_recently_used_files(tmp_path):
+    paths = []
+    for index, puzzle in enumerate([engine.Puzzle(2, 2, 2), engine.Puzzle(3, 3, 2), engine.Puzzle(4, 4, 3)]):
+        path = cache.cache_path(puzzle, str(tmp_path))
+        cache.write_solution(puzzle, solver.DistanceOracle(puzzle), path)
+        os.utime(path, (1000 + index, 1000 + index))
+        paths.append(path)
+    sizes = [os.path.getsize(path) for path in paths]
+
+    cache.evict(str(tmp_path), max_bytes=sizes[1] + sizes[2])
+    assert [os.path.exists(path) for path in paths] == [False, True, True]
+
+    # The file being loaded is kept even when it is the oldest
+    cache.evict(str(tmp_path), max_bytes=0, keep=paths[1])
+    assert [os.path.exists(path) for path in paths] == [False, True, False]
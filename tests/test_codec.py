@@ -0,0 +1,32 @@
+import pytest
+
+import lake_crossing_engine as engine
+
+PUZZLES = [engine.CLASSIC, engine.Puzzle(1, 1, 1), engine.Puzzle(4, 3, 2), engine.Puzzle(5, 5, 3),
+           engine.Puzzle(6, 2, 4)]
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_codec_round_trips_every_state(puzzle):
+    codec = engine.StateCodec(puzzle)
+    table = engine.StateTable(puzzle)
+    codes = set()
+    for state in table._all_states():
+        code = codec.encode(state)
+        assert 0 <= code < codec.size
+        assert codec.decode(code) == state
+        assert table.decode(code) == state
+        codes.add(code)
+    assert len(codes) == sum(1 for _ in table._all_states())
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_table_matches_scalar_rules(puzzle):
+    table = engine.StateTable(puzzle)
+    for code, state in enumerate(table.states):
+        if state is None:
+            continue
+        assert table.valid[code] == engine.is_valid(state, puzzle)
+        assert table.win[code] == engine.is_win(state)
+        for index, move in enumerate(engine.MOVES):
+            assert table.decode(table.step(code, index)) == engine.apply_move(state, move, puzzle)
@@ -0,0 +1,36 @@
+import lake_crossing_engine as engine
+
+
+def test_illegal_moves_leave_the_state_alone():
+    start = engine.initial_state()
+    assert engine.apply_move(start, engine.CROSS_BOAT) == start
+    assert engine.apply_move(start, engine.LAND_PRIEST) == start
+
+    full = engine.State(1, 3, 2, 0, engine.LEFT)
+    assert engine.apply_move(full, engine.BOARD_CARNIVORE) == full
+
+
+def test_classic_rules():
+    state = engine.initial_state()
+    for move in (engine.BOARD_PRIEST, engine.BOARD_PRIEST, engine.CROSS_BOAT):
+        state = engine.apply_move(state, move)
+    # Two priests crossed, leaving one priest with three carnivores
+    assert state == engine.State(1, 3, 2, 0, engine.RIGHT)
+    assert not engine.is_valid(state)
+
+    state = engine.State(0, 0, 0, 0, engine.RIGHT)
+    assert engine.is_valid(state) and engine.is_win(state)
+    assert not engine.is_win(state._replace(boat_position=engine.LEFT))
+
+
+def test_boat_passengers_count_on_the_docked_shore():
+    # One priest on the left shore, two carnivores in the boat docked there
+    state = engine.State(1, 0, 0, 2, engine.LEFT)
+    assert not engine.is_valid(state, engine.CLASSIC)
+    assert engine.is_valid(state._replace(left_priests=2), engine.Puzzle(3, 2, 2))
+
+
+def test_moves_cover_every_action():
+    assert {move.action for move in engine.MOVES} == {engine.BOARD, engine.LAND, engine.CROSS}
+    assert all(engine.MOVES[index] == move for move, index in engine.MOVE_INDEX.items())
+    assert len(engine.MOVE_INDEX) == len(engine.MOVES)
@@ -0,0 +1,81 @@
+import threading
+
+import lake_crossing_engine as engine
+import lake_crossing_events as events
+
+TABLE = engine.StateTable(engine.CLASSIC)
+
+
+def play(moves):
+    """Events for each move in turn from the start, as the game publishes them"""
+    code = TABLE.initial_code()
+    published = []
+    for count, move in enumerate(moves, 1):
+        after = TABLE.step(code, engine.MOVE_INDEX[move])
+        published.append(events.events_for_move(TABLE, code, move, after, count))
+        code = after
+    return published
+
+
+def test_board_land_and_cross():
+    boarded, crossed, landed = play([engine.BOARD_CARNIVORE, engine.CROSS_BOAT, engine.LAND_CARNIVORE])
+    state = TABLE.decode(boarded[0].state_code)
+    assert boarded == [events.CharacterBoarded("carnivores", engine.LEFT, boarded[0].state_code)]
+    assert state.boat_carnivores == 1
+    assert crossed == [events.BoatCrossed(engine.RIGHT, 2, False, crossed[0].state_code)]
+    assert landed == [events.CharacterLanded("carnivores", engine.RIGHT, landed[0].state_code)]
+    assert TABLE.decode(landed[0].state_code) == engine.State(3, 2, 0, 0, engine.RIGHT)
+
+
+def test_illegal_move_publishes_nothing():
+    assert play([engine.CROSS_BOAT]) == [[]]
+
+
+def test_losing_crossing_ends_the_game():
+    *_, crossed = play([engine.BOARD_PRIEST, engine.BOARD_PRIEST, engine.CROSS_BOAT])
+    assert [type(event) for event in crossed] == [events.BoatCrossed, events.GameLost]
+    assert crossed[1] == events.GameLost(3, crossed[0].state_code, None)
+
+
+def test_last_landing_wins():
+    before = TABLE.encode(engine.State(0, 0, 0, 1, engine.RIGHT))
+    after = TABLE.step(before, engine.MOVE_INDEX[engine.LAND_CARNIVORE])
+    landed = events.events_for_move(TABLE, before, engine.LAND_CARNIVORE, after, 11, duration=42.5)
+    assert [type(event) for event in landed] == [events.CharacterLanded, events.GameWon]
+    assert landed[1] == events.GameWon(11, after, 42.5)
+
+
+def test_bus_calls_handlers_by_type_and_survives_errors():
+    bus = events.EventBus()
+    seen = []
+
+    def broken(event):
+        raise RuntimeError("handler bug")
+
+    bus.subscribe(events.GameReset, broken)
+    bus.subscribe(events.GAME_OVER_EVENTS, seen.append)
+    bus.publish(events.GameReset(0))
+    bus.publish(events.GameWon(11, 1, 30.0))
+    bus.publish(events.GameLost(3, 2, 5.0))
+    assert seen == [events.GameWon(11, 1, 30.0), events.GameLost(3, 2, 5.0)]
+
+
+def test_background_handlers_run_in_order_off_the_publishing_thread():
+    bus = events.EventBus()
+    seen = []
+    bus.subscribe(events.GameReset, lambda event: seen.append((event, threading.current_thread())),
+                  background=True)
+    for code in range(5):
+        bus.publish(events.GameReset(code))
+    bus.drain()
+    assert [event for event, _ in seen] == [events.GameReset(code) for code in range(5)]
+    assert all(thread is not threading.current_thread() for _, thread in seen)
+
+
+def test_codec_and_table_give_the_same_events():
+    codec = engine.StateCodec(engine.CLASSIC)
+    before = codec.encode(engine.State(0, 0, 0, 1, engine.RIGHT))
+    after = codec.encode(engine.State(0, 0, 0, 0, engine.RIGHT))
+    landed = events.events_for_move(codec, before, engine.LAND_CARNIVORE, after, 11)
+    assert landed == events.events_for_move(TABLE, before, engine.LAND_CARNIVORE, after, 11)
+    assert [type(event) for event in landed] == [events.CharacterLanded, events.GameWon]
@@ -0,0 +1,35 @@
+import os
+import stat
+
+import pytest
+
+import lake_crossing_files as files
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = str(tmp_path / "new" / "data.bin")
+    files.atomic_write(path, lambda f: f.write(b"first"))
+    files.atomic_write(path, lambda f: f.write(b"second"), permissions=0o644)
+    with open(path, "rb") as f:
+        assert f.read() == b"second"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+def test_atomic_write_leaves_the_old_file_on_error(tmp_path):
+    path = str(tmp_path / "data.bin")
+    files.atomic_write(path, lambda f: f.write(b"old"))
+
+    def fail(f):
+        f.write(b"partial")
+        raise RuntimeError("stopped mid-write")
+
+    with pytest.raises(RuntimeError):
+        files.atomic_write(path, fail)
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+    assert os.listdir(str(tmp_path)) == ["data.bin"]
+
+
+def test_cache_dir_follows_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("LAKE_CROSSING_CACHE_DIR", str(tmp_path))
+    assert files.default_cache_dir() == str(tmp_path)
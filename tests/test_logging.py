@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+
+import pytest
+
+import lake_crossing_logging as logs
+
+
+class CountingStream:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+
+def make_logger(sink, name="test"):
+    logger = logging.getLogger(f"lake_crossing_test.{name}")
+    logger.handlers = [sink]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_records_are_batched_and_closed_cleanly(tmp_path):
+    stream = CountingStream()
+    path = str(tmp_path / "logs" / "game.jsonl")
+    sink = logs.AsyncSink(stream, path, flush_interval=1.0)
+    logger = make_logger(sink, "batch")
+    for index in range(100):
+        logger.info("move %d", index)
+    sink.close()
+
+    lines = "".join(stream.writes).splitlines()
+    assert lines == [f"move {index}" for index in range(100)]
+    assert len(stream.writes) < 100
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["message"] for record in records] == [f"move {index}" for index in range(100)]
+    assert records[0]["level"] == "INFO"
+
+
+def test_arguments_are_formatted_when_logged():
+    stream = CountingStream()
+    sink = logs.AsyncSink(stream, flush_interval=0.01)
+    logger = make_logger(sink, "args")
+    values = [1]
+    logger.warning("values %s", values)
+    values.append(2)
+    sink.close()
+    assert "".join(stream.writes) == "values [1]\n"
+
+
+def test_file_rotates_past_max_bytes(tmp_path):
+    path = str(tmp_path / "game.jsonl")
+    sink = logs.AsyncSink(None, path, max_bytes=400, backups=2, batch_size=1)
+    logger = make_logger(sink, "rotate")
+    for index in range(30):
+        logger.info("record number %d", index)
+    sink.close()
+
+    assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+    messages = []
+    for name in (path + ".2", path + ".1", path):
+        assert os.path.getsize(name) <= 400
+        with open(name, encoding="utf-8") as f:
+            messages += [json.loads(line)["message"] for line in f]
+    # Only the oldest records fall off the end
+    assert messages == [f"record number {index}" for index in range(30 - len(messages), 30)]
+
+
+def test_ring_keeps_the_last_records(tmp_path):
+    sink = logs.AsyncSink(None, capacity=5)
+    logger = make_logger(sink, "ring")
+    for index in range(20):
+        logger.error("error %d", index)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    sink.close()
+
+    path = str(tmp_path / "recent.jsonl")
+    assert sink.dump(path) == 5
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["message"] for record in records] == ["error 16", "error 17", "error 18", "error 19", "failed"]
+    assert "ValueError: boom" in records[-1]["exc"]
+
+
+def test_unknown_subsystem_is_rejected():
+    with pytest.raises(ValueError):
+        logs.get_logger("physics")
@@ -0,0 +1,103 @@
+import json
+import time
+
+import pytest
+
+import lake_crossing_engine as engine
+import lake_crossing_responses as responses
+
+
+def line_count(path):
+    with open(path, encoding="utf-8") as f:
+        return len(f.readlines())
+
+
+def test_puts_are_appended_and_replayed(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    first = responses.ResponseCache(path)
+    first.put("hint", "a", ["one"])
+    first.put("hint", "a", ["two"])
+    first.put("narration", "b", ["three"])
+    assert line_count(path) == 4  # Header and one line per put
+
+    second = responses.ResponseCache(path)
+    assert len(second) == 2
+    assert second.get("hint", "a") in ("one", "two")
+    assert second.get("narration", "b") == "three"
+    assert second.get("analysis", "a") is None
+    assert (second.hits, second.misses) == (2, 1)
+
+
+def test_variants_keep_the_newest(tmp_path):
+    stored = responses.ResponseCache(str(tmp_path / "responses.jsonl"), variants=2)
+    stored.put("hint", "a", ["one", "two"])
+    stored.put("hint", "a", ["three", "", "two"])
+    assert {stored.get("hint", "a") for _ in range(50)} == {"three", "two"}
+
+
+def test_replaced_lines_are_compacted(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    stored = responses.ResponseCache(path)
+    for index in range(100):
+        stored.put("hint", "a", [f"text {index}"])
+    assert line_count(path) <= 1 + 2 + responses.COMPACT_SLACK
+    assert responses.ResponseCache(path).get("hint", "a") in {f"text {index}" for index in range(97, 100)}
+
+
+def test_cut_short_line_is_dropped_and_rewritten(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    stored = responses.ResponseCache(path)
+    stored.put("hint", "a", ["kept"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"name": "hint|b", "ent')
+
+    reloaded = responses.ResponseCache(path)
+    assert len(reloaded) == 1
+    reloaded.put("hint", "c", ["after"])
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    assert all(line.endswith("\n") for line in lines)
+    assert [json.loads(line).get("name") for line in lines[1:]] == ["hint|a", "hint|c"]
+
+
+def test_other_versions_and_garbage_are_replaced(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": responses.VERSION + 1}) + "\n")
+        f.write(json.dumps({"name": "hint|a", "entry": {"created": time.time(), "used": 0,
+                                                        "variants": ["old"]}}) + "\n")
+    stored = responses.ResponseCache(path)
+    assert len(stored) == 0
+    with open(path, encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"version": responses.VERSION}
+
+
+def test_expired_entries_are_misses_and_dropped(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    stored = responses.ResponseCache(path, ttl=60)
+    stored.put("hint", "a", ["stale"])
+    stored._entries["hint|a"]["created"] -= 120
+    assert stored.get("hint", "a") is None
+    stored.put("hint", "a", ["fresh"])
+    assert stored.get("hint", "a") == "fresh"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path = str(tmp_path / "responses.jsonl")
+    stored = responses.ResponseCache(path, max_entries=2)
+    stored.put("hint", "a", ["a"])
+    stored.put("hint", "b", ["b"])
+    stored.get("hint", "a")
+    stored.put("hint", "c", ["c"])
+    assert stored.get("hint", "b") is None
+    assert stored.get("hint", "a") == "a" and stored.get("hint", "c") == "c"
+    assert len(responses.ResponseCache(path, max_entries=2)) == 2
+
+
+def test_keys():
+    state = engine.initial_state()
+    assert responses.state_key(engine.CLASSIC, state) == "3/3/2:3,3,0,0,left"
+    assert responses.data_key(engine.CLASSIC, {"a": 1, "b": 2}) == responses.data_key(engine.CLASSIC, {"b": 2, "a": 1})
+    with pytest.raises(ValueError):
+        responses.ResponseCache.__new__(responses.ResponseCache)._name("joke", "key")
+
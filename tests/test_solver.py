@@ -0,0 +1,115 @@
+from collections import deque
+
+import pytest
+
+import lake_crossing_engine as engine
+import lake_crossing_solver as solver
+
+PUZZLES = [engine.Puzzle(priests, carnivores, capacity)
+           for priests in range(1, 7) for carnivores in range(1, 7) for capacity in range(1, 5)]
+
+
+def puzzle_id(puzzle):
+    return "{}-{}-{}".format(*puzzle)
+
+
+def bfs_distance(puzzle):
+    """Plain forward BFS from the start, independent of the oracle and A*"""
+    start = solver.start_position(puzzle)
+    goal = solver.goal_position()
+    seen = {start: 0}
+    queue = deque([start])
+    while queue:
+        position = queue.popleft()
+        if position == goal:
+            return seen[position]
+        for _, next_position in solver.neighbours(position, puzzle):
+            if next_position not in seen:
+                seen[next_position] = seen[position] + 1
+                queue.append(next_position)
+    return None
+
+
+def walk(puzzle, loads):
+    """Position reached by carrying loads from the start, checking each crossing is legal"""
+    position = solver.start_position(puzzle)
+    for load in loads:
+        steps = dict(solver.neighbours(position, puzzle))
+        assert load in steps, f"{load} cannot be carried from {position}"
+        position = steps[load]
+    return position
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES, ids=puzzle_id)
+def test_solve_matches_bfs(puzzle):
+    expected = bfs_distance(puzzle)
+    result = solver.solve(puzzle)
+    if expected is None:
+        assert result.path is None
+    else:
+        assert len(result.path) == expected
+        assert walk(puzzle, result.path) == solver.goal_position()
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES, ids=puzzle_id)
+def test_oracle_matches_bfs(puzzle):
+    oracle = solver.DistanceOracle(puzzle)
+    assert oracle.distance(solver.start_position(puzzle)) == bfs_distance(puzzle)
+    assert oracle.distance(solver.goal_position()) == 0
+    assert oracle.distance_to_goal(engine.initial_state(puzzle)) == bfs_distance(puzzle)
+
+
+def test_best_steps_lead_one_crossing_closer():
+    oracle = solver.DistanceOracle(engine.Puzzle(5, 5, 3))
+    position = solver.start_position(oracle.puzzle)
+    while oracle.distance(position):
+        steps = oracle.best_steps(position)
+        assert steps
+        for _, next_position in steps:
+            assert oracle.distance(next_position) == oracle.distance(position) - 1
+        position = steps[0][1]
+    assert oracle.best_steps(position) == []
+
+
+@pytest.mark.parametrize("puzzle", [engine.CLASSIC, engine.Puzzle(4, 4, 3), engine.Puzzle(5, 3, 2),
+                                    engine.Puzzle(4, 4, 2)])
+def test_optimal_solutions_are_counted_and_listed_alike(puzzle):
+    oracle = solver.DistanceOracle(puzzle)
+    solutions = list(oracle.optimal_solutions())
+    assert len(solutions) == len(set(solutions)) == oracle.count_optimal_solutions()
+    distance = oracle.distance(solver.start_position(puzzle))
+    for loads in solutions:
+        assert len(loads) == distance
+        assert walk(puzzle, loads) == solver.goal_position()
+
+
+def test_classic_has_four_optimal_solutions():
+    oracle = solver.DistanceOracle(engine.CLASSIC)
+    assert oracle.count_optimal_solutions() == 4
+    assert tuple(solver.solve(engine.CLASSIC).path) in set(oracle.optimal_solutions())
+    assert list(oracle.optimal_solutions(solver.goal_position())) == [()]
+
+
+def test_classic_solve():
+    result = solver.solve(engine.CLASSIC, trace_memory=True)
+    assert len(result.path) == 11
+    assert result.peak_memory > 0
+    assert solver.count_reachable_positions() == 16
+
+
+@pytest.mark.parametrize("puzzle", [engine.CLASSIC, engine.Puzzle(5, 5, 3), engine.Puzzle(4, 2, 2)])
+def test_next_move_codes_follow_the_oracle(puzzle):
+    table = engine.StateTable(puzzle)
+    oracle = solver.DistanceOracle(puzzle)
+    moves = solver.next_move_codes(table, oracle)
+    for code, state in enumerate(table.states):
+        if state is None:
+            continue
+        position = solver.position_of(state)
+        distance = oracle.distance(position)
+        if not distance:
+            # Already on the goal shore, or no longer winnable
+            assert moves[code] == -1
+            continue
+        load = oracle.loads[moves[code]]
+        assert oracle.distance(dict(solver.neighbours(position, puzzle))[load]) == distance - 1
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import lake_crossing_sweep as sweep
+
+
+def test_parse_range():
+    assert sweep.parse_range("3") == [3]
+    assert sweep.parse_range("1-3") == [1, 2, 3]
+    assert sweep.parse_range("2,4,8-10, 4") == [2, 4, 8, 9, 10]
+
+
+@pytest.mark.parametrize("name", ["sweep.csv", "sweep.jsonl"])
+def test_completed_configs_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = sweep.ResultWriter(path)
+    for config in [(3, 3, 2), (4, 4, 2), (2, 1, 1)]:
+        writer.write(sweep.solve_config(config))
+    writer.close()
+    assert sweep.completed_configs(path) == {(3, 3, 2), (4, 4, 2), (2, 1, 1)}
+
+
+@pytest.mark.parametrize("name", ["sweep.csv", "sweep.jsonl"])
+def test_cut_short_row_is_not_complete_and_is_redone(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = sweep.ResultWriter(path)
+    writer.write(sweep.solve_config((3, 3, 2)))
+    writer.close()
+    row = sweep.solve_config((4, 4, 2))
+    if sweep.is_jsonl(path):
+        line = json.dumps(row)
+    else:
+        line = ",".join(str(row[field]) for field in sweep.FIELDS)
+    with open(path, "a") as f:
+        f.write(line[:len(line) - 3])  # Interrupted mid-row
+    assert sweep.completed_configs(path) == {(3, 3, 2)}
+
+    writer = sweep.ResultWriter(path)
+    writer.write(row)
+    writer.close()
+    assert sweep.completed_configs(path) == {(3, 3, 2), (4, 4, 2)}
+
+
+def test_malformed_csv_rows_are_skipped(tmp_path):
+    path = str(tmp_path / "sweep.csv")
+    with open(path, "w", newline="") as f:
+        f.write(",".join(sweep.FIELDS) + "\n")
+        f.write("3,3,2,True,11,16,14,0.001\n")
+        f.write("4,4,2,True,,20,30,0.001\n")  # Solvable without a length
+        f.write("5,5,3,maybe,11,30,20,0.001\n")
+        f.write("6,6,4,False,,40,50\n")  # Missing solve_time
+        f.write("2,2,1,False,,6,3,0.001\n")
+    assert sweep.completed_configs(path) == {(3, 3, 2), (2, 2, 1)}
+
+
+def test_missing_output_has_nothing_completed(tmp_path):
+    assert sweep.completed_configs(str(tmp_path / "none.csv")) == set()